@@ -10,38 +10,138 @@ Config (config.json) example:
   "deny": {"action": "skip"}         ← Ignore Deny buttons
 """
 
+import atexit
+import copy
+import functools
+import hashlib
+import importlib
 import json
+import logging
+import logging.handlers
 import os
+import queue
+import re
+import select
 import sys
 import time
 import signal
+import stat
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from enum import IntEnum
+from importlib.util import find_spec
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional, Tuple, Dict
 
-# Check dependencies
+class _LazyModule:
+    """
+    Placeholder for a slow-to-import module. The first attribute access
+    imports it and rebinds the module-level name to the real module, so
+    later lookups cost nothing extra.
+    """
+    
+    def __init__(self, name: str, alias: str):
+        self._name = name
+        self._alias = alias
+    
+    def load(self):
+        """Import the module and rebind the module-level name to it."""
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return module
+    
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+# Check dependencies. pyautogui, keyboard and PIL take a while to import, so
+# the menu only checks they're installed; they load when a feature needs them
 try:
-    import pyautogui
     import pygetwindow as gw
 except ImportError:
+    gw = None
+if gw is None or find_spec("pyautogui") is None or find_spec("PIL") is None:
     print("❌ Missing dependencies! Run:")
     print("   pip install pyautogui pygetwindow")
     sys.exit(1)
+pyautogui = _LazyModule("pyautogui", "pyautogui")
+Image = _LazyModule("PIL.Image", "Image")
+ImageDraw = _LazyModule("PIL.ImageDraw", "ImageDraw")
+
+HAS_KEYBOARD = find_spec("keyboard") is not None
+if HAS_KEYBOARD:
+    keyboard = _LazyModule("keyboard", "keyboard")
+else:
+    print("⚠️  'keyboard' module not found. Install: pip install keyboard")
+
+def keyboard_ready() -> bool:
+    """
+    Import keyboard on first use and report whether it works. Being installed
+    isn't enough (e.g. it refuses to import without root on Linux); a failed
+    import clears HAS_KEYBOARD so later calls don't retry it.
+    """
+    global HAS_KEYBOARD
+    if HAS_KEYBOARD and isinstance(keyboard, _LazyModule):
+        try:
+            keyboard.load()
+        except (ImportError, OSError) as e:
+            HAS_KEYBOARD = False
+            print(f"⚠️  'keyboard' module could not be loaded: {e}")
+    return HAS_KEYBOARD
 
 try:
-    import keyboard
-    HAS_KEYBOARD = True
+    import numpy as np  # Optional: vectorized fallback matcher (and required by OpenCV)
+    HAS_NUMPY = True
 except ImportError:
-    HAS_KEYBOARD = False
-    print("⚠️  'keyboard' module not found. Install: pip install keyboard")
+    HAS_NUMPY = False
 
 try:
-    import pytesseract
-    from PIL import Image
-    HAS_OCR = True
+    import cv2
+    HAS_CV2 = True
 except ImportError:
-    HAS_OCR = False
-    print("⚠️  OCR modules not found. Install: pip install pytesseract Pillow")
+    HAS_CV2 = False
+    print("⚠️  OpenCV not found, using slow matcher. Install: pip install opencv-python numpy")
+
+try:
+    import mss  # Optional: faster screen capture than pyautogui.screenshot
+    HAS_MSS = True
+except ImportError:
+    HAS_MSS = False
+
+try:
+    import orjson  # Optional: faster config parsing and saving
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import win32gui  # Optional (pywin32, Windows): capture the window even when covered
+    import win32ui
+    from ctypes import windll
+    HAS_WIN32 = True
+except ImportError:
+    HAS_WIN32 = False
+
+try:
+    import winsound  # Windows only; play_alert() falls back to the terminal bell
+    HAS_WINSOUND = True
+except ImportError:
+    HAS_WINSOUND = False
+
+try:
+    import msvcrt  # Windows only; wait_or_keypress() uses select() elsewhere
+    HAS_MSVCRT = True
+except ImportError:
+    HAS_MSVCRT = False
+
+try:
+    import termios  # POSIX only; single-key menu reads (msvcrt on Windows)
+    import tty
+    HAS_TERMIOS = True
+except ImportError:
+    HAS_TERMIOS = False
 
 # Paths - detect if running as PyInstaller exe or as script
 if getattr(sys, 'frozen', False):
@@ -54,6 +154,8 @@ else:
 CONFIG_FILE = SCRIPT_DIR / "config.json"
 LOG_FILE = SCRIPT_DIR / "permission_log.txt"
 ASSETS_DIR = SCRIPT_DIR / "assets"
+# Decoded grayscale templates, rebuilt automatically when a PNG changes
+ASSET_ATLAS_FILE = ASSETS_DIR / "asset_atlas.npz"
 
 # Ensure assets dir exists
 ASSETS_DIR.mkdir(exist_ok=True)
@@ -62,7 +164,25 @@ ASSETS_DIR.mkdir(exist_ok=True)
 # DEFAULT CONFIG
 # ============================================================================
 
-DEFAULT_CONFIG = {
+def _freeze(value):
+    """Read-only copy of a JSON-like value: dicts become mappingproxies, lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    """Plain, mutable (and JSON-serializable) copy of a _freeze()d value."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+# Frozen so no caller can edit the defaults in place and have that edit
+# saved into config.json later; _thaw() gives a mutable copy
+DEFAULT_CONFIG = _freeze({
     "buttons": {
         "confirm": {"image": "confirm.png", "action": "approve", "description": "Confirm button"},
         "deny": {"image": "deny.png", "action": "skip", "description": "Deny button"},
@@ -72,12 +192,18 @@ DEFAULT_CONFIG = {
         "accept_reject_combo": {"image": "accept_reject.png", "action": "skip", "description": "Accept/Reject combo"},
     },
     "settings": {
-        "check_interval": 0.5,
+        "check_interval": 0.5,  # Seconds between scans while active (the shortest interval)
+        "max_interval": 5.0,  # Longest sleep between scans after backing off while idle
+        "backoff_factor": 2.0,  # Interval multiplier per empty scan once idle (1 disables backoff)
         "action_delay": 0.3,
         "cooldown": 2.0,
         "log_actions": True,
         "sound_alert_on_skip": True,
-        "confidence": 0.8
+        "confidence": 0.8,
+        "only_when_focused": True,  # Don't scan while another window is active
+        "use_opencl": True,  # Match on the GPU when OpenCV has an OpenCL device
+        "capture_window_directly": False,  # PrintWindow capture of the Antigravity window (needs pywin32)
+        "frame_similarity": 1.0  # Skip matching while the screen is unchanged since the last idle scan; <1 also skips histogram-close frames (>1 disables)
     },
     "chat_input_mode": {
         "enabled": True,
@@ -92,65 +218,216 @@ DEFAULT_CONFIG = {
         "quit": "ctrl+shift+q"
     },
     "window_titles": ["Antigravity", "Open Agent Manager"]
-}
+})
 
 # ============================================================================
 # CONFIG MANAGEMENT
 # ============================================================================
 
+# Sections whose contents belong to the user; defaults only fill them in if missing
+_MERGE_AS_LEAF = {"buttons"}
+
+def _merge_defaults(config: Dict, defaults: Mapping):
+    """Recursively fill keys missing from config with copies of the defaults."""
+    for key, default in defaults.items():
+        if key not in config:
+            config[key] = _thaw(default)
+        elif isinstance(default, Mapping) and key not in _MERGE_AS_LEAF:
+            if isinstance(config[key], dict):
+                _merge_defaults(config[key], default)
+            else:
+                config[key] = _thaw(default)
+
+# Parsed config, keyed on (path, mtime_ns, size) of config.json
+_CONFIG_CACHE = {"key": None, "data": None}
+
+def invalidate_config_cache():
+    """Drop the cached config so the next load_config() re-reads the file."""
+    _CONFIG_CACHE["key"] = None
+    _CONFIG_CACHE["data"] = None
+
+# Bytes save_config() last wrote, and the file's cache key right after writing them
+_LAST_WRITTEN = {"key": None, "data": None}
+
+def _config_file_key() -> Optional[Tuple[str, int, int]]:
+    """(path, mtime_ns, size) of config.json, or None when it can't be stat()ed."""
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return (str(CONFIG_FILE), st.st_mtime_ns, st.st_size)
+
 def load_config() -> Dict:
-    """Load config from JSON file."""
-    if CONFIG_FILE.exists():
+    """Load config from JSON file (cached until the file changes on disk)."""
+    cache_key = _config_file_key()
+    if cache_key is not None:
+        if _CONFIG_CACHE["key"] == cache_key:
+            # Unchanged on disk - skip the read and parse
+            return copy.deepcopy(_CONFIG_CACHE["data"])
+        
         try:
-            with open(CONFIG_FILE, "r") as f:
-                config = json.load(f)
-                # Merge with defaults
-                for key in DEFAULT_CONFIG:
-                    if key not in config:
-                        config[key] = DEFAULT_CONFIG[key]
-                return config
+            with open(CONFIG_FILE, "rb") as f:
+                raw = f.read()
+            config = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+            # Merge with defaults, including nested sections
+            _merge_defaults(config, DEFAULT_CONFIG)
+            _CONFIG_CACHE["key"] = cache_key
+            _CONFIG_CACHE["data"] = copy.deepcopy(config)
+            return config
         except Exception as e:
             print(f"⚠️ Error loading config: {e}")
     
-    save_config(DEFAULT_CONFIG)
+    config = _thaw(DEFAULT_CONFIG)
+    save_config(config)
     print(f"📝 Created default config: {CONFIG_FILE}")
-    return DEFAULT_CONFIG.copy()
+    return config
 
 def save_config(config: Dict):
-    """Save config to JSON file."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+    """
+    Save config to JSON file. The file is written to a temp file and swapped
+    in, so an interrupted save never leaves a truncated config behind. The
+    write is skipped when the file still holds exactly these bytes.
+    """
+    # Key order is kept: the order of "buttons" is their scan priority
+    if HAS_ORJSON:
+        data = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(config, indent=2).encode("utf-8")
+    _PENDING_SAVE["config"] = None
+    if data == _LAST_WRITTEN["data"] and _config_file_key() == _LAST_WRITTEN["key"]:
+        return
+    
+    tmp_file = CONFIG_FILE.with_suffix(".tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, CONFIG_FILE)
+    # Seed the cache with what was just written so the next load_config()
+    # doesn't read and parse it back
+    invalidate_config_cache()
+    cache_key = _config_file_key()
+    _LAST_WRITTEN["key"] = cache_key
+    _LAST_WRITTEN["data"] = data if cache_key is not None else None
+    if cache_key is not None:
+        config = copy.deepcopy(config)
+        _merge_defaults(config, DEFAULT_CONFIG)
+        _CONFIG_CACHE["data"] = config
+        _CONFIG_CACHE["key"] = cache_key
+    get_config.cache_clear()
+
+# Config edited in memory but not written yet (see mark_config_dirty)
+_PENDING_SAVE = {"config": None}
+
+def mark_config_dirty(config: Dict):
+    """
+    Record an unsaved edit. Menu edits are only written at commit points
+    (starting the monitor, opening config.json, leaving the menu) through
+    flush_config(), so a session of edits costs one write.
+    """
+    _PENDING_SAVE["config"] = config
+
+def flush_config() -> bool:
+    """Save the pending config, if any. Returns True when something was written."""
+    config = _PENDING_SAVE["config"]
+    if config is None:
+        return False
+    save_config(config)
+    return True
+
+# Last resort for edits still pending when the interpreter exits
+atexit.register(flush_config)
+
+class ConfigView:
+    """
+    Read-only shortcuts into a config dict, each looked up once. Make a new
+    view after the config may have changed.
+    """
+    
+    def __init__(self, raw: Dict):
+        self.raw = raw
+    
+    @functools.cached_property
+    def chat_enabled(self) -> bool:
+        return self.raw.get("chat_input_mode", {}).get("enabled", True)
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Dict:
+    """The session's shared config dict, loaded on first use."""
+    return load_config()
 
 # ============================================================================
 # LOGGING
 # ============================================================================
 
+# Log lines go through a QueueHandler; a QueueListener thread does the file
+# I/O so the scan loop never blocks on disk writes.
+_file_logger = logging.getLogger("antigravity_auto_permit")
+_file_logger.setLevel(logging.INFO)
+_file_logger.propagate = False
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+def _stop_log_writer():
+    """Write everything queued so far, then close the log file."""
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+
+def _ensure_log_writer():
+    """Start the background log writer on first use."""
+    global _log_listener
+    if _log_listener is None:
+        with _log_listener_lock:
+            if _log_listener is None:
+                # delay=True: the file is only created once a line is written
+                file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8", delay=True)
+                file_handler.setFormatter(
+                    logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+                log_queue = queue.SimpleQueue()
+                _file_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+                listener = logging.handlers.QueueListener(log_queue, file_handler)
+                listener.start()
+                atexit.register(_stop_log_writer)
+                _log_listener = listener
+
+# (epoch second, "HH:MM:SS") - console stamp reused within the same second
+_console_stamp = (None, "")
+
 def log(msg: str, config: Dict = None):
     """Print and log message."""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[{timestamp}] {msg}")
+    global _console_stamp
+    t = time.time()
+    sec = int(t)
+    stamp = _console_stamp
+    if stamp[0] != sec:
+        stamp = _console_stamp = (sec, time.strftime("%H:%M:%S", time.localtime(sec)))
+    print(f"[{stamp[1]}] {msg}")
     
     if config and config.get("settings", {}).get("log_actions", True):
-        try:
-            with open(LOG_FILE, "a", encoding="utf-8") as f:
-                full_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                f.write(f"[{full_ts}] {msg}\n")
-        except:
-            pass
+        _ensure_log_writer()
+        # The listener thread formats the full timestamp and writes the line
+        _file_logger.info(msg)
 
 def play_alert():
     """Play alert sound."""
-    try:
-        import winsound
-        winsound.Beep(800, 150)
-    except:
-        print("\a")
+    if HAS_WINSOUND:
+        try:
+            winsound.Beep(800, 150)
+            return
+        except RuntimeError:
+            pass
+    print("\a")
 
 # ALLOWED BUTTONS FILE
 # ============================================================================
 
 ALLOWED_BUTTONS_FILE = SCRIPT_DIR / "allowed_buttons.txt"
 
+# One comma-separated entry, without surrounding whitespace ("alt + enter" stays whole)
+_TOKEN_RE = re.compile(r"[^,\s](?:[^,]*[^,\s])?")
+# One non-blank, non-comment line, without surrounding whitespace
+_CONTENT_LINE_RE = re.compile(r"^[^\S\n]*([^#\s](?:[^\n]*\S)?)[^\S\n]*$", re.M)
+
 class AllowedButtonsReader:
     """
     Reads allowed button names from allowed_buttons.txt file.
@@ -163,13 +440,17 @@ class AllowedButtonsReader:
     
     def __init__(self, config: Dict):
         self.config = config
-        self.chat_config = config.get("chat_input_mode", {})
-        self.enabled = self.chat_config.get("enabled", True)
+        self.chat_config = config["chat_input_mode"]
+        self.enabled = self.chat_config["enabled"]
         self.last_read_time = 0
-        self.refresh_interval = self.chat_config.get("refresh_interval", 2.0)
+        self.refresh_interval = self.chat_config["refresh_interval"]
         self.cached_buttons = []
-        self.fallback_to_config = self.chat_config.get("fallback_to_config", True)
+        self._allowed_set = frozenset()  # cached_buttons, for exact lookups
+        self._decisions: Dict[str, bool] = {}  # button name -> allowed, for cached_buttons
+        self.fallback_to_config = self.chat_config["fallback_to_config"]
         self.last_file_content = ""
+        self._last_hash = None  # blake2b digest of the last raw file bytes
+        self._last_stamp = None  # (mtime_ns, size) of the file when last read
         
         # Button name aliases (what user might type -> config button names)
         self.aliases = {
@@ -180,6 +461,11 @@ class AllowedButtonsReader:
             "esc": ["deny", "reject"],
         }
         
+        # Config button names lowercased once, in config order
+        self._btn_lower = [(btn.lower(), btn) for btn in config["buttons"]]
+        # Resolved token -> button names; seeded with aliases, filled lazily
+        self._token_map = {alias: list(names) for alias, names in self.aliases.items()}
+        
         # Create the file if it doesn't exist
         self._ensure_file_exists()
     
@@ -202,22 +488,30 @@ class AllowedButtonsReader:
                 f.write("# confirm\n")
             log(f"📝 Created: {ALLOWED_BUTTONS_FILE}")
     
-    def read_file_text(self) -> str:
-        """Read text from allowed_buttons.txt."""
+    def read_file_bytes(self) -> Optional[bytes]:
+        """
+        Read the raw bytes of allowed_buttons.txt: empty if it is missing,
+        None if it exists but couldn't be read.
+        """
         try:
-            if ALLOWED_BUTTONS_FILE.exists():
-                with open(ALLOWED_BUTTONS_FILE, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    # Remove comments and empty lines
-                    lines = []
-                    for line in content.split("\n"):
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            lines.append(line)
-                    return ", ".join(lines)
+            # open() alone; a separate exists() check would stat the file again
+            with open(ALLOWED_BUTTONS_FILE, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
         except Exception as e:
             log(f"⚠️ Error reading file: {e}")
-        return ""
+            return None
+    
+    @staticmethod
+    def clean_file_text(content: str) -> str:
+        """Remove comments and empty lines, joining the rest with commas."""
+        return ", ".join(_CONTENT_LINE_RE.findall(content))
+    
+    def read_file_text(self) -> str:
+        """Read text from allowed_buttons.txt."""
+        raw = self.read_file_bytes()
+        return self.clean_file_text(raw.decode("utf-8", errors="replace")) if raw else ""
     
     def parse_button_names(self, text: str) -> list:
         """
@@ -227,28 +521,25 @@ class AllowedButtonsReader:
         if not text:
             return []
         
-        # Split by comma, clean up each name
-        raw_names = [name.strip().lower() for name in text.split(",")]
-        
         button_names = []
-        for name in raw_names:
-            if not name:
-                continue
-            
-            # Check if it's an alias
-            if name in self.aliases:
-                button_names.extend(self.aliases[name])
-            else:
-                # Check if it matches a config button name
-                for btn_name in self.config.get("buttons", {}).keys():
-                    if name in btn_name.lower() or btn_name.lower() in name:
-                        button_names.append(btn_name)
-                        break
-                else:
-                    # No match found, add as-is (might match partially later)
-                    button_names.append(name)
+        # Single pass over the lowercased text yields the stripped names
+        for name in _TOKEN_RE.findall(text.lower()):
+            resolved = self._token_map.get(name)
+            if resolved is None:
+                resolved = self._resolve_token(name)
+                self._token_map[name] = resolved
+            button_names.extend(resolved)
         
-        return list(set(button_names))  # Remove duplicates
+        # Remove duplicates, keeping first-seen order so equal files give equal lists
+        return list(dict.fromkeys(button_names))
+    
+    def _resolve_token(self, name: str) -> list:
+        """Map one lowercase token to config button names (first partial match wins)."""
+        for btn_lower, btn_name in self._btn_lower:
+            if name in btn_lower or btn_lower in name:
+                return [btn_name]
+        # No match found, keep as-is (might match partially later)
+        return [name]
     
     def get_allowed_buttons(self) -> list:
         """
@@ -261,19 +552,40 @@ class AllowedButtonsReader:
         # Check if we need to refresh
         current_time = time.time()
         if current_time - self.last_read_time > self.refresh_interval:
-            file_text = self.read_file_text()
+            self.last_read_time = current_time
             
-            # Only log if content changed
-            if file_text != self.last_file_content:
-                self.cached_buttons = self.parse_button_names(file_text)
-                self.last_file_content = file_text
-                
-                if self.cached_buttons:
-                    log(f"📝 Allowed buttons: {self.cached_buttons}")
-                else:
-                    log("📝 No buttons in file - using config.json defaults")
+            # Don't even open the file while its mtime and size are unchanged
+            try:
+                st = ALLOWED_BUTTONS_FILE.stat()
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if stamp is not None and stamp == self._last_stamp:
+                return self.cached_buttons
             
-            self.last_read_time = current_time
+            raw = self.read_file_bytes()
+            if raw is None:
+                # Keep the last good list; the stamp stays stale so the next refresh retries
+                return self.cached_buttons
+            self._last_stamp = stamp
+            digest = hashlib.blake2b(raw, digest_size=8).digest()
+            
+            # Only decode and re-parse when the raw bytes changed
+            if digest != self._last_hash:
+                self._last_hash = digest
+                file_text = self.clean_file_text(raw.decode("utf-8", errors="replace"))
+                
+                # Only log if content changed
+                if file_text != self.last_file_content:
+                    self.cached_buttons = self.parse_button_names(file_text)
+                    self.last_file_content = file_text
+                    self._allowed_set = frozenset(self.cached_buttons)
+                    self._decisions = {}
+                    
+                    if self.cached_buttons:
+                        log(f"📝 Allowed buttons: {self.cached_buttons}")
+                    else:
+                        log("📝 No buttons in file - using config.json defaults")
         
         return self.cached_buttons
     
@@ -300,13 +612,18 @@ class AllowedButtonsReader:
             else:
                 return False  # Skip everything
         
-        # Check if this button is in the allowed list
-        button_lower = button_name.lower()
-        for allowed_btn in allowed:
-            if allowed_btn in button_lower or button_lower in allowed_btn:
-                return True
+        # Decided once per button for each version of the allowed list
+        decision = self._decisions.get(button_name)
+        if decision is None:
+            button_lower = button_name.lower()
+            # Exact name first, then a partial match against any allowed entry
+            decision = button_lower in self._allowed_set or any(
+                allowed_btn in button_lower or button_lower in allowed_btn
+                for allowed_btn in allowed
+            )
+            self._decisions[button_name] = decision
         
-        return False  # Not in allowed list - skip
+        return decision  # False: not in allowed list - skip
 
 # Alias for backward compatibility
 ChatInputReader = AllowedButtonsReader
@@ -315,61 +632,508 @@ ChatInputReader = AllowedButtonsReader
 # BUTTON FINDER
 # ============================================================================
 
+class Result(IntEnum):
+    """What scan_and_act() did; also the index into PermissionMonitor.stats."""
+    APPROVED = 0
+    DENIED = 1
+    SKIPPED = 2
+    CLICKED = 3
+
+# Button-name keywords that mark approve / deny buttons ("deny_confirm" counts
+# as approve because "confirm" is tested first)
+_APPROVE_NAME_RE = re.compile(r"confirm|accept")
+_DENY_NAME_RE = re.compile(r"deny|reject")
+
+class _Deferred:
+    """A call run on first result(), with the Future methods scan_and_act() uses."""
+    
+    def __init__(self, fn, *args):
+        self._call = functools.partial(fn, *args)
+        self._done = False
+        self._value = None
+    
+    def result(self):
+        if not self._done:
+            self._value = self._call()
+            self._done = True
+        return self._value
+    
+    def cancel(self) -> bool:
+        return not self._done
+
+def find_window(titles):
+    """First visible, non-minimized window matching titles, or None."""
+    for title in titles:
+        for win in gw.getWindowsWithTitle(title):
+            if win.visible and not win.isMinimized:
+                return win
+    return None
+
+def find_window_region(titles) -> Optional[Tuple[int, int, int, int]]:
+    """Bounds (x, y, width, height) of the first visible window matching titles."""
+    win = find_window(titles)
+    if win is None:
+        return None
+    return (win.left, win.top, win.width, win.height)
+
+def mss_to_image(shot) -> "Image.Image":
+    """
+    PIL RGB image from an mss screenshot, decoded straight from its BGRA
+    buffer (mss's .rgb property would build an extra RGB copy in Python first).
+    """
+    return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+class PrintWindowCapture:
+    """
+    Captures one window through PrintWindow into a reused GDI bitmap, so the
+    window is grabbed even when other windows cover it and only its own
+    pixels are copied. Windows only (pywin32).
+    """
+    
+    PW_RENDERFULLCONTENT = 0x2  # also captures DirectX / Chromium-rendered content
+    GA_ROOT = 2                 # GetAncestor(): the top-level window
+    HWND_TTL = 1.0              # seconds to trust the looked-up window handle
+    
+    def __init__(self, titles):
+        self.titles = titles
+        self._hwnd = None
+        self._hwnd_time = float("-inf")
+        self._key = None  # (hwnd, width, height) the GDI objects were made for
+        self._hwnd_dc = self._mfc_dc = self._save_dc = self._bitmap = None
+    
+    def _target_hwnd(self):
+        now = time.monotonic()
+        if now - self._hwnd_time >= self.HWND_TTL or not win32gui.IsWindow(self._hwnd or 0):
+            win = find_window(self.titles)
+            self._hwnd = getattr(win, "_hWnd", None)
+            self._hwnd_time = now
+        return self._hwnd
+    
+    @property
+    def hwnd(self):
+        """Handle of the window the last grab() was taken from."""
+        return self._hwnd
+    
+    @classmethod
+    def bring_to_front(cls, hwnd, point: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Make hwnd the foreground window if it isn't already. With point, also
+        require that the window under it belongs to hwnd, so a click can't land
+        on something on top. Returns whether input will reach the window.
+        """
+        if not win32gui.IsWindow(hwnd):
+            return False
+        if win32gui.GetForegroundWindow() != hwnd:
+            try:
+                win32gui.SetForegroundWindow(hwnd)
+            except Exception:
+                pass  # Windows may refuse a foreground change; checked below
+            if win32gui.GetForegroundWindow() != hwnd:
+                return False
+        if point is not None:
+            under = win32gui.WindowFromPoint(point)
+            if win32gui.GetAncestor(under, cls.GA_ROOT) != hwnd:
+                return False
+        return True
+    
+    def grab(self):
+        """Returns (BGRA array or PIL image, (left, top)), or (None, (0, 0))."""
+        hwnd = self._target_hwnd()
+        if not hwnd:
+            return None, (0, 0)
+        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+        w, h = right - left, bottom - top
+        if w <= 0 or h <= 0:
+            return None, (0, 0)
+        
+        # GDI objects are only recreated when the window or its size changes
+        if self._key != (hwnd, w, h):
+            self.release()
+            self._hwnd_dc = win32gui.GetWindowDC(hwnd)
+            self._mfc_dc = win32ui.CreateDCFromHandle(self._hwnd_dc)
+            self._save_dc = self._mfc_dc.CreateCompatibleDC()
+            self._bitmap = win32ui.CreateBitmap()
+            self._bitmap.CreateCompatibleBitmap(self._mfc_dc, w, h)
+            self._save_dc.SelectObject(self._bitmap)
+            self._key = (hwnd, w, h)
+        
+        if not windll.user32.PrintWindow(hwnd, self._save_dc.GetSafeHdc(), self.PW_RENDERFULLCONTENT):
+            return None, (0, 0)
+        bits = self._bitmap.GetBitmapBits(True)
+        if HAS_CV2:
+            return np.frombuffer(bits, dtype=np.uint8).reshape(h, w, 4), (left, top)
+        return Image.frombuffer("RGB", (w, h), bits, "raw", "BGRX", 0, 1), (left, top)
+    
+    def release(self):
+        """Free the GDI objects."""
+        if self._key is None:
+            return
+        try:
+            win32gui.DeleteObject(self._bitmap.GetHandle())
+            self._save_dc.DeleteDC()
+            self._mfc_dc.DeleteDC()
+            win32gui.ReleaseDC(self._key[0], self._hwnd_dc)
+        except Exception:
+            pass  # the window may already be gone
+        self._key = None
+        self._hwnd_dc = self._mfc_dc = self._save_dc = self._bitmap = None
+
 class ButtonFinder:
     """Finds buttons on screen and performs configured actions."""
     
-    def __init__(self, config: Dict):
+    WINDOW_REGION_TTL = 1.0  # seconds to trust cached window bounds
+    REGION_MISS_CYCLES = 10  # scans finding nothing before the window bounds are re-queried
+    FOCUS_CHECK_TTL = 0.1    # seconds to trust the cached foreground-window check
+    # Coarse-to-fine matching on a Gaussian pyramid (full, 1/2, 1/4 scale, ...).
+    # Frames get at least PYRAMID_LEVELS levels, plus more until the coarsest one
+    # is at most COARSE_MAX_WIDTH wide (so 4K captures start at the same ~480 px)
+    PYRAMID_LEVELS = 3
+    MAX_PYRAMID_LEVELS = 5
+    COARSE_MAX_WIDTH = 640
+    PYRAMID_MIN_TEMPLATE = 8   # px; levels where the template gets smaller are skipped
+    COARSE_MARGIN = 0.1        # downscaling blurs edges, so accept weaker coarse peaks
+    COARSE_CANDIDATES = 5      # peaks taken from the coarsest level
+    REFINE_PAD = 16            # px around a candidate searched at the next finer level
+    ASSET_CHECK_TTL = 30.0     # seconds between stat()s of the button images
+    # Coarse-to-fine for the sampling matcher (no OpenCV): search at 1/4 scale
+    # with a relaxed confidence, then confirm at full scale around the hit
+    PIL_COARSE_SCALE = 4
+    PIL_COARSE_CONFIDENCE = 0.7  # fraction of confidence required on the coarse pass
+    PIL_REFINE_PAD = 8           # px around the coarse hit searched at full scale
+    # Max luminance difference for a sampled pixel to count as matching. One gray
+    # channel discriminates less than three RGB ones did at 30, hence tighter
+    SAMPLE_TOLERANCE = 20
+    # Result for each action kind from _classify_button()
+    KIND_RESULTS = {
+        "click_approve": Result.APPROVED, "kb_approve": Result.APPROVED,
+        "click_deny": Result.DENIED, "kb_deny": Result.DENIED,
+        "skip": Result.SKIPPED,
+    }
+    
+    def __init__(self, config: Dict,
+                 window_region_provider: Optional[Callable[[], Optional[Tuple[int, int, int, int]]]] = None):
         self.config = config
-        self.confidence = config.get("settings", {}).get("confidence", 0.8)
-        self.last_action_time = 0
-        self.cooldown = config.get("settings", {}).get("cooldown", 2.0)
-        self.action_delay = config.get("settings", {}).get("action_delay", 0.3)
+        if isinstance(pyautogui, _LazyModule):
+            # Import before any window bounds are read: on Windows pyautogui makes
+            # the process DPI-aware, which changes the coordinates reported
+            pyautogui.load()
+        titles = config["window_titles"]
+        if window_region_provider is None:
+            window_region_provider = lambda: find_window_region(titles)
+        self.window_region_provider = window_region_provider
+        self._window_region = None
+        self._window_region_time = float("-inf")
+        self._window_lookup_failed = False  # last window lookup raised (can't tell)
+        self._miss_cycles = 0  # consecutive scans that found no button
+        self._last_hit: Optional[str] = None  # button acted on last; searched first
+        # Whether the last scan_and_act() searched for every candidate with the
+        # cooldown open and found none - only then is its frame truly idle
+        self.last_scan_idle = False
+        self._window_titles_lower = [t.lower() for t in titles]
+        self._focused = False
+        self._focus_time = float("-inf")
+        settings = config["settings"]
+        self.confidence = settings["confidence"]
+        self.last_action_time = float("-inf")  # time.monotonic() of the last action
+        self.cooldown = settings["cooldown"]
+        self.action_delay = settings["action_delay"]
+        self.sound_alert_on_skip = settings["sound_alert_on_skip"]
+        self.only_when_focused = settings["only_when_focused"]
+        
+        # Fixed search region (x, y, width, height), or None to follow the window
+        search_config = settings.get("search_region", {})
+        if search_config.get("enabled", False):
+            self.search_region = (
+                search_config.get("x", 0),
+                search_config.get("y", 0),
+                search_config.get("width", 500),
+                search_config.get("height", 1080),
+            )
+        else:
+            self.search_region = None
+        # Direct window capture when asked for (and no fixed region overrides it)
+        self._window_capture = (
+            PrintWindowCapture(titles)
+            if HAS_WIN32 and settings["capture_window_directly"] and self.search_region is None
+            else None
+        )
+        self._cycle_region = None  # search region pinned by ready_to_scan() for capture()
+        # Window the current frame was PrintWindow-captured from, else None. That
+        # window may be covered, so actions on its frame bring it to the front first
+        self._frame_hwnd = None
+        # Clicks and keys run on one worker thread, fed (fire time, fn, args) tuples
+        self._action_queue = queue.SimpleQueue()
+        self._action_cancel = threading.Event()
+        self._action_thread: Optional[threading.Thread] = None
+        # mss handles can't be shared across threads, so keep one per thread
+        self._mss_local = threading.local()
+        # Template searches run in parallel against one shared screenshot; matchTemplate
+        # releases the GIL, so one worker per button up to the core count
+        workers = max(1, min(len(config["buttons"]), os.cpu_count() or 1))
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="button-search")
+        # Match on the GPU through OpenCL (cv2.UMat) when a device is available
+        self.use_opencl = (HAS_CV2 and settings["use_opencl"]
+                           and cv2.ocl.haveOpenCL())
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        # Decoded grayscale template pyramids: image name -> [(array, height, width), ...]
+        # from full scale down
+        self._templates: Dict[str, list] = {}
+        self._template_depth = 1  # most levels any template pyramid has
+        # Decoded grayscale needles for the PIL fallback path
+        self._needle_images: Dict[str, "Image.Image"] = {}
+        # Their sample points for pil_template_match(), computed once per image,
+        # and the same for 1/4-scale needles (only for needles large enough)
+        self._needle_samples: Dict[str, tuple] = {}
+        self._needle_samples_small: Dict[str, tuple] = {}
+        self.reload_templates()
+    
+    def reload_templates(self):
+        """
+        (Re)build everything derived from config["buttons"]: decoded images,
+        the unpacked button tuple and the action table. Call after buttons or
+        their images change.
+        """
+        # (name, config, action, image, roi) per button, unpacked once for the scan loop
+        self._buttons = tuple(
+            (btn_name, btn_config, btn_config.get("action", "skip"),
+             btn_config.get("image", ""), self._parse_roi(btn_name, btn_config.get("roi")))
+            for btn_name, btn_config in self.config["buttons"].items()
+        )
+        image_names = []
+        # (mtime_ns, size) per configured image, None while missing; see check_assets()
+        self._asset_stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._assets_checked = time.monotonic()
+        for btn_name, _, _, image_name, _ in self._buttons:
+            if not image_name or image_name in self._asset_stamps:
+                continue
+            stamp = self._asset_stamps[image_name] = self._asset_stamp(image_name)
+            if stamp is None:
+                # Reported once here; scans just skip buttons without an image
+                log(f"⚠️ Image not found for [{btn_name}]: {image_name}", self.config)
+                continue
+            image_names.append(image_name)
+        if HAS_CV2:
+            self._load_templates(image_names)
+        else:
+            self._load_needles(image_names)
+        self._build_action_table()
     
-    def can_act(self) -> bool:
-        """Check if cooldown has passed."""
-        return (time.time() - self.last_action_time) > self.cooldown
+    def _parse_roi(self, btn_name: str, roi) -> Optional[Tuple[int, int, int, int]]:
+        """
+        A button's roi from config as an (x, y, w, h) tuple, or None when it has
+        none. A malformed roi is logged and ignored, so the whole frame is searched.
+        """
+        if not roi:
+            return None
+        if (isinstance(roi, (list, tuple)) and len(roi) == 4
+                and all(isinstance(v, int) and not isinstance(v, bool) for v in roi)
+                and roi[2] > 0 and roi[3] > 0):
+            return tuple(roi)
+        log(f"⚠️ Ignoring invalid roi for [{btn_name}]: {roi!r} (expected [x, y, width, height])",
+            self.config)
+        return None
     
-    def pil_template_match(self, screenshot, template_path: Path) -> Optional[Tuple[int, int, int, int]]:
+    @staticmethod
+    def _asset_stamp(image_name: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a button image file, or None if it isn't one."""
+        try:
+            st = (ASSETS_DIR / image_name).stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def check_assets(self, now: Optional[float] = None) -> bool:
         """
-        Pure PIL-based template matching. No OpenCV required.
-        Returns (x, y, width, height) if found, None otherwise.
+        Reload the templates when a button image was added, removed or changed
+        on disk. The files are stat()ed at most once per ASSET_CHECK_TTL, so
+        scans normally only pay a clock comparison. Returns True on reload.
         """
-        from PIL import Image
+        if now is None:
+            now = time.monotonic()
+        if now - self._assets_checked < self.ASSET_CHECK_TTL:
+            return False
+        self._assets_checked = now
+        if all(self._asset_stamp(name) == stamp for name, stamp in self._asset_stamps.items()):
+            return False
+        log("🔄 Button images changed - reloading", self.config)
+        self.reload_templates()
+        return True
+    
+    def has_image(self, image_name: str) -> bool:
+        """Whether a button image was loaded (exists on disk and decoded)."""
+        return image_name in self._templates or image_name in self._needle_images
+    
+    @staticmethod
+    def _read_atlas() -> Dict[str, Tuple[Tuple[int, int], "np.ndarray"]]:
+        """Atlas entries: image name -> ((mtime_ns, size) of its PNG, grayscale array)."""
+        try:
+            with np.load(ASSET_ATLAS_FILE, allow_pickle=False) as data:
+                return {
+                    name: (tuple(int(v) for v in data[name + ".stamp"]), data[name])
+                    for name in data.files if not name.endswith(".stamp")
+                }
+        except Exception:
+            return {}  # missing or unreadable - rebuilt from the PNGs
+    
+    @staticmethod
+    def _write_atlas(entries: Dict[str, Tuple[Tuple[int, int], "np.ndarray"]]):
+        """Replace the atlas with entries (written to a temp file, then swapped in)."""
+        arrays = {}
+        for name, (stamp, tpl) in entries.items():
+            arrays[name] = tpl
+            arrays[name + ".stamp"] = np.array(stamp, dtype=np.int64)
+        tmp_file = ASSET_ATLAS_FILE.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_file, ASSET_ATLAS_FILE)
+        except OSError:
+            pass  # only a cache; the PNGs are decoded again next start
+    
+    def _load_templates(self, image_names: list):
+        """
+        Load every configured button image once and keep it in memory. Decoded
+        arrays come from ASSET_ATLAS_FILE while their PNG is unchanged;
+        otherwise the PNG is decoded and the atlas rewritten.
+        """
+        self._templates = {}
+        atlas = self._read_atlas()
+        entries = {}
+        for image_name in image_names:
+            image_path = ASSETS_DIR / image_name
+            try:
+                st = image_path.stat()
+                stamp = (st.st_mtime_ns, st.st_size)
+                cached = atlas.get(image_name)
+                if cached is not None and cached[0] == stamp:
+                    tpl = cached[1]
+                else:
+                    # imdecode(fromfile) rather than imread: imread can't open
+                    # non-ASCII paths on Windows
+                    tpl = cv2.imdecode(np.fromfile(str(image_path), dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+                    if tpl is None:
+                        raise ValueError("not a readable image")
+                entries[image_name] = (stamp, tpl)
+                levels = [tpl]
+                while len(levels) < self.MAX_PYRAMID_LEVELS:
+                    smaller = cv2.pyrDown(levels[-1])
+                    if min(smaller.shape[:2]) < self.PYRAMID_MIN_TEMPLATE:
+                        break
+                    levels.append(smaller)
+                self._templates[image_name] = [
+                    (self._to_device(level), level.shape[0], level.shape[1]) for level in levels
+                ]
+            except Exception as e:
+                log(f"⚠️ Could not load template {image_name}: {e}", self.config)
         
-        template = Image.open(template_path).convert('RGB')
-        screen = screenshot.convert('RGB')
+        # Frame levels deeper than this would never be matched against
+        self._template_depth = max((len(levels) for levels in self._templates.values()), default=1)
         
+        if any(atlas.get(name, (None,))[0] != stamp for name, (stamp, _) in entries.items()):
+            self._write_atlas(entries)
+    
+    def _to_device(self, arr: "np.ndarray"):
+        """Upload an array to the OpenCL device when enabled, else return it as-is."""
+        return cv2.UMat(arr) if self.use_opencl else arr
+    
+    def _load_needles(self, image_names: list):
+        """Open and decode every configured button image once for the PIL path."""
+        self._needle_images = {}
+        self._needle_samples = {}
+        self._needle_samples_small = {}
+        for image_name in image_names:
+            image_path = ASSETS_DIR / image_name
+            try:
+                # convert() forces the decode now rather than on the first scan
+                needle = Image.open(image_path).convert("L")
+                self._needle_images[image_name] = needle
+                self._needle_samples[image_name] = self._sample_template(needle)
+                tw, th = needle.size
+                scale = self.PIL_COARSE_SCALE
+                if min(tw, th) // scale >= self.PYRAMID_MIN_TEMPLATE:
+                    small = needle.resize((tw // scale, th // scale), Image.BILINEAR)
+                    # Scanned at every offset, so sample it more sparsely
+                    self._needle_samples_small[image_name] = self._sample_template(small, 2)
+            except Exception as e:
+                log(f"⚠️ Could not load template {image_name}: {e}", self.config)
+    
+    def can_act(self, now: Optional[float] = None) -> bool:
+        """Check if cooldown has passed (now is a time.monotonic() reading)."""
+        if now is None:
+            now = time.monotonic()
+        return (now - self.last_action_time) > self.cooldown
+    
+    def cooldown_remaining(self, now: Optional[float] = None) -> float:
+        """Seconds until can_act() allows the next action (0 when it already does)."""
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, self.last_action_time + self.cooldown - now)
+    
+    @staticmethod
+    def _sample_template(template: "Image.Image", min_step: int = 1) -> tuple:
+        """
+        Sample points of a grayscale ("L") template for pil_template_match():
+        (points, NumPy points or None, width, height).
+        """
         tw, th = template.size
-        sw, sh = screen.size
-        
-        # Sample template pixels for comparison
         template_pixels = template.load()
-        screen_pixels = screen.load()
         
         # Get template sample points (don't check every pixel for speed)
-        sample_step = max(1, min(tw, th) // 10)
+        sample_step = max(min_step, min(tw, th) // 10)
         sample_points = []
         for y in range(0, th, sample_step):
             for x in range(0, tw, sample_step):
                 sample_points.append((x, y, template_pixels[x, y]))
         
-        threshold = int(len(sample_points) * self.confidence)
+        np_points = None
+        if HAS_NUMPY:
+            np_points = [(x, y, np.int16(pixel)) for x, y, pixel in sample_points]
+        return sample_points, np_points, tw, th
+    
+    def pil_template_match(self, screenshot, template, samples: Optional[tuple] = None,
+                           confidence: Optional[float] = None,
+                           step: int = 3) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Pure PIL-based template matching on luminance. No OpenCV required.
+        template is a decoded PIL image or a path to one; samples is its cached
+        _sample_template() result, computed here when not given. confidence
+        defaults to the configured one; step is the scan stride in pixels.
+        Returns (x, y, width, height) if found, None otherwise.
+        """
+        if samples is None:
+            if not isinstance(template, Image.Image):
+                template = Image.open(template)
+            if template.mode != 'L':
+                template = template.convert('L')
+            samples = self._sample_template(template)
+        sample_points, np_points, tw, th = samples
+        screen = screenshot if screenshot.mode == 'L' else screenshot.convert('L')
+        sw, sh = screen.size
+        
+        if confidence is None:
+            confidence = self.confidence
+        threshold = int(len(sample_points) * confidence)
+        
+        if np_points is not None:
+            return self._np_sample_match(np.asarray(screen, dtype=np.int16), np_points,
+                                         threshold, tw, th, step, self.SAMPLE_TOLERANCE)
         
+        screen_pixels = screen.load()
         best_match = None
         best_matches = 0
+        tolerance = self.SAMPLE_TOLERANCE
         
         # Scan screen (with step for speed)
-        step = 3
         for sy in range(0, sh - th, step):
             for sx in range(0, sw - tw, step):
                 matches = 0
                 for tx, ty, tpixel in sample_points:
                     try:
-                        spixel = screen_pixels[sx + tx, sy + ty]
                         # Check if pixels are similar (within tolerance)
-                        if (abs(tpixel[0] - spixel[0]) < 30 and 
-                            abs(tpixel[1] - spixel[1]) < 30 and 
-                            abs(tpixel[2] - spixel[2]) < 30):
+                        if abs(tpixel - screen_pixels[sx + tx, sy + ty]) < tolerance:
                             matches += 1
                     except:
                         pass
@@ -380,171 +1144,586 @@ class ButtonFinder:
         
         return best_match
     
+    @staticmethod
+    def _np_sample_match(screen: "np.ndarray", sample_points: list, threshold: int,
+                         tw: int, th: int, step: int = 3,
+                         tolerance: int = 20) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Vectorized form of the pil_template_match() scan over (x, y, int16 gray)
+        sample points: for each point, one strided slice covers every candidate
+        offset at once, and the per-offset match counts are accumulated in an array.
+        """
+        sh, sw = screen.shape[:2]
+        rows = len(range(0, sh - th, step))
+        cols = len(range(0, sw - tw, step))
+        if rows <= 0 or cols <= 0:
+            return None
+        
+        matches = np.zeros((rows, cols), dtype=np.int32)
+        # |a - b| < tolerance  <=>  0 <= a - (b - tolerance + 1) < 2 * tolerance - 1;
+        # read as unsigned, negatives wrap high, so one compare replaces abs() + compare
+        span = 2 * tolerance - 1
+        for tx, ty, tpixel in sample_points:
+            window = screen[ty:ty + step * (rows - 1) + 1:step, tx:tx + step * (cols - 1) + 1:step]
+            # Pixels are similar if their luminance is within tolerance
+            matches += (window - np.int16(tpixel - tolerance + 1)).view(np.uint16) < span
+        
+        # argmax picks the first best offset in scan order, like the loop does
+        best = int(matches.argmax())
+        if matches.flat[best] < max(threshold, 1):
+            return None
+        sy, sx = divmod(best, cols)
+        return (sx * step, sy * step, tw, th)
+    
     def get_search_region(self) -> Optional[Tuple[int, int, int, int]]:
         """Get the configured search region (x, y, width, height)."""
-        search_config = self.config.get("settings", {}).get("search_region", {})
-        
-        if search_config.get("enabled", False):
-            x = search_config.get("x", 0)
-            y = search_config.get("y", 0)
-            w = search_config.get("width", 500)
-            h = search_config.get("height", 1080)
-            return (x, y, w, h)
+        if self.search_region:
+            return self.search_region
         
-        # Fallback: Try to find Antigravity window by title
+        # Fallback: the Antigravity window itself
+        return self.get_window_region()
+    
+    def get_window_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """Antigravity window bounds, re-queried at most once per WINDOW_REGION_TTL."""
+        now = time.monotonic()
+        if now - self._window_region_time >= self.WINDOW_REGION_TTL:
+            try:
+                self._window_region = self.window_region_provider()
+                self._window_lookup_failed = False
+            except Exception:
+                self._window_region = None
+                self._window_lookup_failed = True
+            self._window_region_time = now
+        return self._window_region
+    
+    def invalidate_window_region(self):
+        """Re-query the window bounds on the next get_window_region() call."""
+        self._window_region_time = float("-inf")
+    
+    def is_target_focused(self) -> bool:
+        """Whether the foreground window is one of window_titles (cached briefly)."""
+        now = time.monotonic()
+        if now - self._focus_time >= self.FOCUS_CHECK_TTL:
+            try:
+                active = gw.getActiveWindow()
+                title = active.title.lower() if active is not None else ""
+                self._focused = any(t in title for t in self._window_titles_lower)
+            except Exception:
+                self._focused = True  # Can't tell - don't block scanning
+            self._focus_time = now
+        return self._focused
+    
+    def _grab_mss(self, region: Optional[Tuple[int, int, int, int]]):
+        """
+        Capture with mss. Returns a BGRA NumPy array when OpenCV is available
+        (no PIL round-trip), otherwise a PIL image, plus the capture's origin.
+        """
+        sct = getattr(self._mss_local, "sct", None)
+        if sct is None:
+            sct = self._mss_local.sct = mss.mss()
+        if region:
+            x, y, w, h = region
+            monitor = {"left": x, "top": y, "width": w, "height": h}
+        else:
+            monitor = sct.monitors[1]  # Primary monitor, like pyautogui.screenshot()
+        shot = sct.grab(monitor)
+        origin = (monitor["left"], monitor["top"])
+        if HAS_CV2:
+            return np.asarray(shot), origin
+        return mss_to_image(shot), origin
+    
+    def _grab_screen(self, region: Optional[Tuple[int, int, int, int]] = None
+                     ) -> Tuple[Optional["Image.Image"], Tuple[int, int]]:
+        """
+        Take one screenshot of region (default: the search region, or full screen).
+        Returns (screenshot, (left, top)) so matches can be mapped back to screen coords.
+        """
+        self._frame_hwnd = None
         try:
-            for title in self.config.get("window_titles", ["Antigravity"]):
-                windows = gw.getWindowsWithTitle(title)
-                for win in windows:
-                    if win.visible and not win.isMinimized:
-                        return (win.left, win.top, win.width, win.height)
-        except Exception:
-            pass
-        return None
+            if self._window_capture is not None:
+                shot, origin = self._window_capture.grab()
+                if shot is not None:
+                    self._frame_hwnd = self._window_capture.hwnd
+                    return shot, origin
+                # PrintWindow failed - fall back to a normal screen grab
+            if region is None:
+                region = self.get_search_region()
+            if HAS_MSS:
+                return self._grab_mss(region)
+            if region:
+                # Capture only the Antigravity window / configured region
+                x, y, w, h = region
+                return pyautogui.screenshot(region=region), (x, y)
+            # Fallback: full screen if Antigravity window not found
+            return pyautogui.screenshot(), (0, 0)
+        except Exception as e:
+            log(f"⚠️ Screen capture error: {e}", self.config)
+            return None, (0, 0)
+    
+    def _prepare_frame(self, screenshot) -> list:
+        """
+        Grayscale screenshot pyramid (full scale first), shared by all templates.
+        Each level is (image, height, width); with OpenCL the images are
+        uploaded once here and reused by every match this tick.
+        screenshot is a BGRA array from mss or a PIL image from pyautogui.
+        """
+        if isinstance(screenshot, np.ndarray):
+            screen_gray = cv2.cvtColor(screenshot, cv2.COLOR_BGRA2GRAY)
+        else:
+            screen_gray = np.asarray(screenshot.convert("L"))
+        levels = [screen_gray]
+        # No deeper than the deepest template pyramid: _cv_locate() starts at
+        # min(template levels, frame levels), so extra frame levels go unused
+        max_levels = min(self.MAX_PYRAMID_LEVELS, self._template_depth)
+        while len(levels) < max_levels and (
+                len(levels) < self.PYRAMID_LEVELS or levels[-1].shape[1] > self.COARSE_MAX_WIDTH):
+            levels.append(cv2.pyrDown(levels[-1]))
+        return [(self._to_device(level), level.shape[0], level.shape[1]) for level in levels]
+    
+    def _crop(self, image, y0: int, y1: int, x0: int, x1: int):
+        """Sub-image view that works for both NumPy arrays and UMats."""
+        if self.use_opencl:
+            return cv2.UMat(image, (y0, y1), (x0, x1))
+        return image[y0:y1, x0:x1]
     
-    def find_button(self, image_name: str) -> Optional[Tuple[int, int]]:
-        """Find a button by its image file, searching only in configured region."""
-        image_path = ASSETS_DIR / image_name
-        if not image_path.exists():
+    def _level_threshold(self, level: int) -> float:
+        """Score a candidate must reach at a pyramid level (exact confidence at full scale)."""
+        return self.confidence - self.COARSE_MARGIN if level else self.confidence
+    
+    @staticmethod
+    def _peaks(result, threshold: float, tw: int, th: int, limit: int) -> list:
+        """Up to limit (score, x, y) peaks above threshold, one per template-sized area."""
+        if not isinstance(result, np.ndarray):
+            result = result.get()  # UMat -> NumPy
+        peaks = []
+        while len(peaks) < limit:
+            _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+            if not max_val >= threshold:  # also rejects NaN from flat templates
+                break
+            peaks.append((max_val, x, y))
+            # Blank this peak's neighbourhood so the next pick is a different spot
+            result[max(0, y - th // 2):y + th // 2 + 1, max(0, x - tw // 2):x + tw // 2 + 1] = -1
+        return peaks
+    
+    @staticmethod
+    def _roi_bounds(roi, origin: Tuple[int, int], width: int,
+                    height: int) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Clip a button's screen-space roi [x, y, w, h] to a frame captured at
+        origin. Returns frame-relative (x0, y0, x1, y1), or None when the roi
+        lies outside the frame.
+        """
+        if not roi:
+            return (0, 0, width, height)
+        x, y, w, h = roi
+        ox, oy = origin
+        x0, y0 = max(0, x - ox), max(0, y - oy)
+        x1, y1 = min(width, x - ox + w), min(height, y - oy + h)
+        if x1 <= x0 or y1 <= y0:
             return None
+        return (x0, y0, x1, y1)
+    
+    def _cv_locate(self, frame: list, image_name: str, origin: Tuple[int, int],
+                   roi=None) -> Optional[Tuple[int, int]]:
+        """
+        Match a cached template pyramid against a prepared frame with OpenCV.
+        Candidates come from the coarsest usable level and are re-matched in a
+        small crop at each finer level; only peaks that still reach confidence
+        at full scale count. roi restricts every level to the button's area.
+        """
+        levels = self._templates.get(image_name)
+        if not levels:
+            return None
+        bounds = self._roi_bounds(roi, origin, frame[0][2], frame[0][1])
+        if bounds is None:
+            return None
+        bx0, by0, bx1, by1 = bounds
+        
+        # pyrDown rounds sizes up, so the far roi edge is rounded up too; a
+        # roi still too small for the template at a level starts one finer
+        top = min(len(levels), len(frame)) - 1
+        while True:
+            tpl, th, tw = levels[top]
+            image, ih, iw = frame[top]
+            x0, y0 = bx0 >> top, by0 >> top
+            x1, y1 = min(iw, -(-bx1 >> top)), min(ih, -(-by1 >> top))
+            if th <= y1 - y0 and tw <= x1 - x0:
+                break
+            if top == 0:
+                return None
+            top -= 1
         
+        if (x0, y0, x1, y1) != (0, 0, iw, ih):
+            image = self._crop(image, y0, y1, x0, x1)
+        result = cv2.matchTemplate(image, tpl, cv2.TM_CCOEFF_NORMED)
+        candidates = [
+            (score, x0 + cx, y0 + cy)
+            for score, cx, cy in self._peaks(result, self._level_threshold(top), tw, th,
+                                             self.COARSE_CANDIDATES if top else 1)
+        ]
+        
+        for level in range(top - 1, -1, -1):
+            tpl, th, tw = levels[level]
+            image, ih, iw = frame[level]
+            lx0, ly0 = bx0 >> level, by0 >> level
+            lx1, ly1 = min(iw, -(-bx1 >> level)), min(ih, -(-by1 >> level))
+            refined = []
+            for _, cx, cy in candidates:
+                x0 = max(lx0, cx * 2 - self.REFINE_PAD)
+                y0 = max(ly0, cy * 2 - self.REFINE_PAD)
+                x1 = min(lx1, cx * 2 + tw + self.REFINE_PAD)
+                y1 = min(ly1, cy * 2 + th + self.REFINE_PAD)
+                if x1 - x0 < tw or y1 - y0 < th:
+                    continue
+                result = cv2.matchTemplate(self._crop(image, y0, y1, x0, x1), tpl, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, (mx, my) = cv2.minMaxLoc(result)
+                if max_val >= self._level_threshold(level):
+                    refined.append((max_val, x0 + mx, y0 + my))
+            candidates = refined
+        
+        if not candidates:
+            return None
+        _, mx, my = max(candidates)
+        tw, th = levels[0][2], levels[0][1]
+        ox, oy = origin
+        return (ox + mx + tw // 2, oy + my + th // 2)
+    
+    def find_button(self, image_name: str, screen_img, origin: Tuple[int, int] = (0, 0),
+                    roi=None) -> Optional[Tuple[int, int]]:
+        """
+        Find a button by its image file inside an already captured screenshot.
+        screen_img is the frame from _prepare_frame() when OpenCV is available,
+        otherwise the PIL screenshot. roi is the button's optional screen-space
+        [x, y, width, height] hint from config; only that area is searched.
+        Uses OpenCV matchTemplate when it is installed, otherwise the sampling
+        matcher; exactly one matcher runs.
+        """
+        if HAS_CV2:
+            try:
+                return self._cv_locate(screen_img, image_name, origin, roi)
+            except Exception as e:
+                log(f"⚠️ Button search error: {e}", self.config)
+                return None
+        
+        needle = self._needle_images.get(image_name)
+        if needle is None:
+            return None
+        
+        # A capture() frame is [full, 1/4 scale]; a bare screenshot has no coarse level
+        levels = screen_img if isinstance(screen_img, list) else [screen_img]
+        screen_img = levels[0]
+        bounds = self._roi_bounds(roi, origin, screen_img.width, screen_img.height)
+        if bounds is None:
+            return None
+        if roi:
+            screen_img = screen_img.crop(bounds)
+            levels = self._prepare_pil_frame(screen_img) if len(levels) > 1 else [screen_img]
+        ox, oy = origin[0] + bounds[0], origin[1] + bounds[1]
         try:
-            # Get configured search region
-            region = self.get_search_region()
+            # No OpenCV here, so pyautogui.locate(confidence=...) can't work -
+            # match with the PIL / NumPy sampler on the same screenshot
+            samples = self._needle_samples[image_name]
+            coarse = self._needle_samples_small.get(image_name)
+            step = 3  # full-frame stride
+
+            if coarse is not None and len(levels) > 1:
+                hit = self.pil_template_match(levels[1], None, coarse,
+                                              self.confidence * self.PIL_COARSE_CONFIDENCE, step=1)
+                if hit is None:
+                    return None
+                # Confirm at full scale in a small window around the coarse hit
+                scale, pad = self.PIL_COARSE_SCALE, self.PIL_REFINE_PAD
+                x0 = max(0, hit[0] * scale - pad)
+                y0 = max(0, hit[1] * scale - pad)
+                x1 = min(screen_img.width, hit[0] * scale + samples[2] + pad)
+                y1 = min(screen_img.height, hit[1] * scale + samples[3] + pad)
+                screen_img = screen_img.crop((x0, y0, x1, y1))
+                ox, oy = ox + x0, oy + y0
+                # The window is only ~2 * pad offsets wide, and its origin has an
+                # arbitrary phase against a stride - so try every offset
+                step = 1
             
-            if region:
-                # Search only in the Antigravity window
-                x, y, w, h = region
-                
-                # First try pyautogui with OpenCV (if available) - with region
-                try:
-                    location = pyautogui.locateCenterOnScreen(
-                        str(image_path),
-                        confidence=self.confidence,
-                        region=region
-                    )
-                    if location:
-                        return (location.x, location.y)
-                except Exception:
-                    pass
-                
-                # Fallback to pure PIL matching - only scan the Antigravity region
-                screenshot = pyautogui.screenshot(region=region)
-                match = self.pil_template_match(screenshot, image_path)
-                if match:
-                    mx, my, mw, mh = match
-                    # Convert region-relative coords to screen coords
-                    return (x + mx + mw // 2, y + my + mh // 2)
-            else:
-                # Fallback: Search full screen if Antigravity window not found
-                try:
-                    location = pyautogui.locateCenterOnScreen(
-                        str(image_path),
-                        confidence=self.confidence
-                    )
-                    if location:
-                        return (location.x, location.y)
-                except Exception:
-                    pass
+            match = self.pil_template_match(screen_img, needle, samples, step=step)
+            if match:
+                mx, my, mw, mh = match
+                # Convert screenshot-relative coords to screen coords
+                return (ox + mx + mw // 2, oy + my + mh // 2)
                 
-                screenshot = pyautogui.screenshot()
-                match = self.pil_template_match(screenshot, image_path)
-                if match:
-                    mx, my, mw, mh = match
-                    return (mx + mw // 2, my + mh // 2)
-                    
         except Exception as e:
             log(f"⚠️ Button search error: {e}", self.config)
         return None
-    def click_at(self, x: int, y: int, button_name: str) -> bool:
-        """Click at coordinates."""
-        if not self.can_act():
-            return False
-        
-        time.sleep(self.action_delay)
+    
+    def _schedule(self, fn, *args):
+        """
+        Queue fn(*args) for the action worker, to run after action_delay, so
+        scanning is not blocked. The cooldown is reserved up front, from when
+        the action fires.
+        """
+        fire_at = time.monotonic() + self.action_delay
+        self.last_action_time = fire_at
+        if self._action_thread is None:
+            self._action_thread = threading.Thread(target=self._action_worker,
+                                                   name="button-actions", daemon=True)
+            self._action_thread.start()
+        self._action_queue.put((fire_at, fn, args))
+    
+    def _action_worker(self):
+        """Run queued actions in order, each no earlier than its fire time."""
+        while True:
+            item = self._action_queue.get()
+            if item is None:
+                return
+            fire_at, fn, args = item
+            # close() wakes the wait and drops whatever hasn't fired yet
+            if self._action_cancel.wait(max(0.0, fire_at - time.monotonic())):
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                log(f"⚠️ Action error: {e}", self.config)
+    
+    def _do_click(self, x: int, y: int, button_name: str, hwnd=None):
+        if hwnd and not PrintWindowCapture.bring_to_front(hwnd, (x, y)):
+            log(f"⚠️ Antigravity window not in front - click on [{button_name}] skipped", self.config)
+            return
         pyautogui.click(x, y)
-        self.last_action_time = time.time()
         log(f"🖱️ Clicked [{button_name}] at ({x}, {y})", self.config)
+    
+    def _do_keyboard(self, shortcut: str, description: str, hwnd=None):
+        if hwnd and not PrintWindowCapture.bring_to_front(hwnd):
+            log(f"⚠️ Antigravity window not in front - [{shortcut}] for {description} skipped",
+                self.config)
+            return
+        keyboard.press_and_release(shortcut)
+        log(f"⌨️ Sent [{shortcut}] for {description}", self.config)
+    
+    def click_at(self, x: int, y: int, button_name: str, now: Optional[float] = None) -> bool:
+        """Click at coordinates (after action_delay)."""
+        if not self.can_act(now):
+            return False
+        
+        self._schedule(self._do_click, x, y, button_name, self._frame_hwnd)
         return True
     
-    def send_keyboard(self, shortcut: str, description: str) -> bool:
-        """Send keyboard shortcut."""
-        if not self.can_act():
+    def send_keyboard(self, shortcut: str, description: str, now: Optional[float] = None) -> bool:
+        """Send keyboard shortcut (after action_delay)."""
+        if not self.can_act(now):
             return False
         
-        if HAS_KEYBOARD:
-            time.sleep(self.action_delay)
-            keyboard.press_and_release(shortcut)
-            self.last_action_time = time.time()
-            log(f"⌨️ Sent [{shortcut}] for {description}", self.config)
+        if keyboard_ready():
+            self._schedule(self._do_keyboard, shortcut, description, self._frame_hwnd)
             return True
         return False
     
-    def scan_and_act(self, chat_reader: Optional['ChatInputReader'] = None) -> Optional[str]:
+    def close(self):
+        """Cancel actions that haven't fired yet and release the worker threads and capture handle."""
+        self._action_cancel.set()
+        self._action_queue.put(None)  # wakes the action worker if it is idle
+        self._pool.shutdown(wait=False)
+        sct = getattr(self._mss_local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._mss_local.sct = None
+        if self._window_capture is not None:
+            self._window_capture.release()
+    
+    def ready_to_scan(self) -> bool:
+        """Cheap checks that decide whether a screenshot is worth taking."""
+        # Antigravity in the background - skip without taking a screenshot
+        if self.only_when_focused and not self.is_target_focused():
+            return False
+        # Nothing to click while the Antigravity window is hidden or minimized. A
+        # fixed search region doesn't depend on the window, and when the lookup
+        # fails we can't tell - scan (full screen) rather than never scanning
+        if (self.search_region is None and self.get_window_region() is None
+                and not self._window_lookup_failed):
+            return False
+        # Pick up re-captured button images (stat()s only once per ASSET_CHECK_TTL)
+        self.check_assets()
+        # Pin the region for this cycle so capture() grabs exactly what was checked,
+        # even if the window-region cache expires in between
+        self._cycle_region = self.get_search_region()
+        return True
+    
+    def capture(self) -> Optional[Tuple[object, Tuple[int, int]]]:
+        """
+        Take one screenshot for a scan tick, of the region ready_to_scan() pinned.
+        Returns (frame, origin) where frame is ready for find_button(), or None.
+        """
+        region, self._cycle_region = self._cycle_region, None
+        screen_img, origin = self._grab_screen(region)
+        if screen_img is None:
+            return None
+        # Convert and downscale once here instead of once per template
+        if HAS_CV2:
+            screen_img = self._prepare_frame(screen_img)
+        else:
+            screen_img = self._prepare_pil_frame(screen_img)
+        return screen_img, origin
+    
+    def _prepare_pil_frame(self, screenshot: "Image.Image") -> list:
+        """[full-scale grayscale image, 1/4-scale image] for the sampling matcher."""
+        screen = screenshot if screenshot.mode == "L" else screenshot.convert("L")
+        scale = self.PIL_COARSE_SCALE
+        small = screen.resize((max(1, screen.width // scale), max(1, screen.height // scale)),
+                              Image.BILINEAR)
+        return [screen, small]
+    
+    def scan_and_act(self, frame: Optional[Tuple[object, Tuple[int, int]]] = None,
+                     chat_reader: Optional['ChatInputReader'] = None) -> Optional[Tuple[Result, str]]:
         """
         Scan for all configured buttons and perform their configured action.
         
+        frame is a capture() result shared for the whole tick; without one,
+        the finder checks ready_to_scan() and captures the screen itself.
+        
         If chat_reader is provided and enabled:
           - Only process buttons mentioned in the chat input
           - If chat is empty, fallback to config.json behavior
         
-        Returns the button name that was acted upon, or None.
+        Returns (Result, button name) for the button acted upon, or None.
         """
-        buttons = self.config.get("buttons", {})
+        now = time.monotonic()  # one clock read for every cooldown check this tick
+        self.last_scan_idle = False
+        cooldown_open = self.can_act(now)
         
-        for btn_name, btn_config in buttons.items():
-            image = btn_config.get("image", "")
-            action = btn_config.get("action", "skip")
-            
-            # Check if this button should be processed based on chat input
-            if chat_reader:
-                if not chat_reader.should_process_button(btn_name, action):
-                    continue  # Skip this button - not in chat input
-            
-            # Try to find this button on screen
-            coords = self.find_button(image)
-            
-            if coords:
-                x, y = coords
-                
-                # If chat_reader has explicit button list, override action to "approve"
-                if chat_reader and chat_reader.enabled and chat_reader.get_allowed_buttons():
-                    # User explicitly typed this button in chat - approve it
-                    if "confirm" in btn_name.lower() or "accept" in btn_name.lower() or "deny_confirm" in btn_name.lower():
-                        if self.click_at(x, y, btn_name):
-                            return f"APPROVED: {btn_name} (from chat)"
-                    elif "deny" in btn_name.lower() or "reject" in btn_name.lower():
-                        if self.click_at(x, y, btn_name):
-                            return f"DENIED: {btn_name} (from chat)"
-                    else:
-                        if self.click_at(x, y, btn_name):
-                            return f"CLICKED: {btn_name} (from chat)"
-                else:
-                    # Use config.json action
-                    if action == "approve":
-                        # Click the button (for approve buttons like Confirm, Accept)
-                        if "confirm" in btn_name.lower() or "accept" in btn_name.lower():
-                            if self.click_at(x, y, btn_name):
-                                return f"APPROVED: {btn_name}"
-                        # Or use keyboard shortcut
-                        elif self.send_keyboard("alt+enter", btn_name):
-                            return f"APPROVED: {btn_name}"
-                            
-                    elif action == "deny":
-                        # Click deny buttons
-                        if "deny" in btn_name.lower() or "reject" in btn_name.lower():
-                            if self.click_at(x, y, btn_name):
-                                return f"DENIED: {btn_name}"
-                        elif self.send_keyboard("escape", btn_name):
-                            return f"DENIED: {btn_name}"
-                            
-                    elif action == "skip":
-                        # Do nothing, but notify
-                        if self.config.get("settings", {}).get("sound_alert_on_skip", True):
-                            play_alert()
-                        log(f"⏸️ SKIPPED: {btn_name} (manual required)", self.config)
-                        return f"SKIPPED: {btn_name}"
+        if chat_reader:
+            # Check if each button should be processed based on chat input
+            candidates = [
+                button for button in self._buttons
+                if chat_reader.should_process_button(button[0], button[2])
+            ]
+        else:
+            candidates = self._buttons
+        
+        # Buttons typed in the chat file are always clicked, whatever their config action
+        from_chat = bool(chat_reader and chat_reader.enabled and chat_reader.get_allowed_buttons())
+        if not cooldown_open:
+            # Clicks and keys are refused during the cooldown; only skip alerts can
+            # still fire, so don't search for anything else
+            if from_chat:
+                return None
+            candidates = [button for button in candidates
+                          if self._action_table[button[0]][0] == "skip"]
+        
+        if not candidates:
+            return None
+        # The button acted on last is the likeliest to be back, so it goes first
+        # (stable sort: the rest keep config order)
+        last_hit = self._last_hit
+        if last_hit is not None and candidates[0][0] != last_hit:
+            candidates = sorted(candidates, key=lambda button: button[0] != last_hit)
+        
+        if frame is None:
+            if not self.ready_to_scan():
+                return None
+            frame = self.capture()
+            if frame is None:
+                return None
+        screen_img, origin = frame
         
+        # Buttons sharing an image and roi (e.g. one PNG under two names) are searched once
+        searches = {}
+        for _, _, _, image, roi in candidates:
+            key = (image, roi)
+            if key in searches:
+                continue
+            if self.use_opencl:
+                # One OpenCL queue and one uploaded frame - run the matches in turn
+                searches[key] = _Deferred(self.find_button, image, screen_img, origin, roi)
+            else:
+                searches[key] = self._pool.submit(self.find_button, image, screen_img, origin, roi)
+        try:
+            # Walk results in candidate order so button priority stays deterministic;
+            # acting on one cancels the searches that haven't started yet
+            found = False
+            for btn_name, _, _, image, roi in candidates:
+                coords = searches[(image, roi)].result()
+                if coords:
+                    found = True
+                    self._miss_cycles = 0
+                    result = self._act(btn_name, coords, from_chat, now)
+                    if result:
+                        self._last_hit = btn_name
+                        return result
+        finally:
+            for search in searches.values():
+                search.cancel()
+        
+        if not found:
+            self.last_scan_idle = cooldown_open
+            # A long run of empty scans may mean the window moved within the TTL
+            self._miss_cycles += 1
+            if self._miss_cycles >= self.REGION_MISS_CYCLES:
+                self._miss_cycles = 0
+                self.invalidate_window_region()
+        return None
+    
+    @staticmethod
+    def _classify_button(btn_name: str, action: str) -> Tuple[Optional[str], Result]:
+        """
+        Decide once how a button is handled, from its name and configured action.
+        Returns (kind, chat_result): kind is a key of _handlers (None = no action)
+        and chat_result is reported when chat input selects the button.
+        """
+        name = btn_name.lower()
+        is_approve = _APPROVE_NAME_RE.search(name) is not None
+        is_deny = _DENY_NAME_RE.search(name) is not None
+        if is_approve:
+            chat_result = Result.APPROVED
+        elif is_deny:
+            chat_result = Result.DENIED
+        else:
+            chat_result = Result.CLICKED
+        
+        if action == "approve":
+            # Click approve buttons like Confirm, Accept; otherwise use the shortcut
+            kind = "click_approve" if is_approve else "kb_approve"
+        elif action == "deny":
+            kind = "click_deny" if is_deny else "kb_deny"
+        elif action == "skip":
+            kind = "skip"
+        else:
+            kind = None
+        return kind, chat_result
+    
+    def _build_action_table(self):
+        """Classify every configured button so scans don't re-inspect names."""
+        self._action_table: Dict[str, Tuple[Optional[str], Result]] = {
+            btn_name: self._classify_button(btn_name, action)
+            for btn_name, _, action, _, _ in self._buttons
+        }
+        self._handlers: Dict[str, Callable[[int, int, str, float], bool]] = {
+            "click_approve": self.click_at,
+            "kb_approve": lambda x, y, name, now: self.send_keyboard("alt+enter", name, now),
+            "click_deny": self.click_at,
+            "kb_deny": lambda x, y, name, now: self.send_keyboard("escape", name, now),
+            "skip": self._skip,
+        }
+    
+    def _skip(self, x: int, y: int, btn_name: str, now: float) -> bool:
+        """Do nothing, but notify."""
+        if self.sound_alert_on_skip:
+            play_alert()
+        log(f"⏸️ SKIPPED: {btn_name} (manual required)", self.config)
+        return True
+    
+    def _act(self, btn_name: str, coords: Tuple[int, int], from_chat: bool,
+             now: float) -> Optional[Tuple[Result, str]]:
+        """Perform the configured action for a button found at coords."""
+        x, y = coords
+        kind, chat_result = self._action_table[btn_name]
+        
+        # If the chat file has an explicit button list, override action to "approve"
+        if from_chat:
+            # User explicitly typed this button in chat - click it
+            if self.click_at(x, y, btn_name, now):
+                return chat_result, btn_name
+            return None
+        
+        # Use config.json action
+        if kind is not None and self._handlers[kind](x, y, btn_name, now):
+            return self.KIND_RESULTS[kind], btn_name
         return None
 
 # ============================================================================
@@ -554,18 +1733,38 @@ class ButtonFinder:
 class PermissionMonitor:
     """Monitors screen for permission dialogs."""
     
-    def __init__(self, config: Dict):
+    # Idle backoff: after this many empty scans, multiply the sleep by
+    # settings.backoff_factor each tick, up to settings.max_interval
+    IDLE_SCANS_BEFORE_BACKOFF = 5
+    # Unchanged-frame skip: grayscale histogram bins, and the longest a frame can
+    # go unscanned (at least the cooldown, so a button found mid-cooldown is retried)
+    FRAME_HIST_BINS = 64
+    FORCED_SCAN_INTERVAL = 2.0  # seconds
+    
+    def __init__(self, config: Optional[Dict] = None):
+        if config is None:
+            config = get_config()
         self.config = config
         self.button_finder = ButtonFinder(config)
         self.chat_reader = ChatInputReader(config)
         self.running = False
-        self.stats = {"approved": 0, "denied": 0, "skipped": 0, "clicked": 0}
-        self.check_interval = config.get("settings", {}).get("check_interval", 0.5)
+        self.stats = [0] * len(Result)  # counts indexed by Result
+        self.check_interval = config["settings"]["check_interval"]
+        self.max_interval = max(config["settings"]["max_interval"], self.check_interval)
+        self.backoff_factor = max(config["settings"]["backoff_factor"], 1.0)
+        self.chat_mode_enabled = self.chat_reader.enabled
+        self._idle_hits = 0
+        self._stop_event = threading.Event()
+        self.frame_similarity = config["settings"]["frame_similarity"]
+        self.forced_scan_interval = max(self.FORCED_SCAN_INTERVAL, self.button_finder.cooldown)
+        self._last_sig = None   # (digest, histogram) of the last frame scanned without a hit
+        self._frame_sig = None  # the same for the current tick's frame
+        self._last_scan_time = float("-inf")
+        self._last_chat_buttons = []  # allowed buttons last reported to the console
         
         # Debug screenshot settings (disabled for production)
         self.debug_screenshots = False
         self.screenshot_interval = 5.0  # seconds
-        self.last_screenshot_time = 0
         self.screenshot_dir = SCRIPT_DIR / "tool_ss"
         self.screenshot_dir.mkdir(exist_ok=True)
         self.screenshot_count = 0
@@ -573,15 +1772,18 @@ class PermissionMonitor:
     def start_monitoring(self):
         """Start the monitoring loop."""
         self.running = True
+        self._stop_event.clear()
+        self._idle_hits = 0
         
         # Set up signal handler for immediate Ctrl+C response
         def signal_handler(sig, frame):
             self.running = False
+            self._stop_event.set()
             print("\n\n⏹️ Stopping... (Ctrl+C pressed)")
         
         signal.signal(signal.SIGINT, signal_handler)
         
-        chat_mode_enabled = self.config.get("chat_input_mode", {}).get("enabled", True)
+        chat_mode_enabled = self.chat_mode_enabled
         
         print("\n" + "=" * 60)
         if chat_mode_enabled:
@@ -612,8 +1814,7 @@ class PermissionMonitor:
         print("  " + "-" * 50)
         for btn_name, btn_config in self.config.get("buttons", {}).items():
             action = btn_config.get("action", "skip")
-            icons = {"approve": "✅", "deny": "❌", "skip": "⏸️"}
-            icon = icons.get(action, "❓")
+            icon = _ACTION_ICONS.get(action, "❓")
             print(f"    {btn_name:<25} {icon} {action.upper()}")
         print("  " + "-" * 50 + "\n")
         
@@ -622,121 +1823,235 @@ class PermissionMonitor:
         else:
             log("Started per-button monitoring", self.config)
         
-        last_chat_buttons = []
+        self._last_chat_buttons = []
+        
+        if self.debug_screenshots:
+            # On its own thread so slow full-screen locates never delay a scan
+            threading.Thread(target=self._debug_loop, daemon=True).start()
         
         try:
             while self.running:
-                # Check for file input changes (display status)
-                if chat_mode_enabled:
-                    current_buttons = self.chat_reader.get_allowed_buttons()
-                    if current_buttons != last_chat_buttons:
-                        if current_buttons:
-                            print(f"\n  📄 Active buttons from file: {', '.join(current_buttons)}")
-                        else:
-                            print(f"\n  📄 File empty - using config.json defaults")
-                        last_chat_buttons = current_buttons.copy()
-                
-                # Scan and act
-                result = self.button_finder.scan_and_act(
-                    chat_reader=self.chat_reader if chat_mode_enabled else None
-                )
-                
-                if result:
-                    if "APPROVED" in result:
-                        self.stats["approved"] += 1
-                    elif "DENIED" in result:
-                        self.stats["denied"] += 1
-                    elif "SKIPPED" in result:
-                        self.stats["skipped"] += 1
-                    elif "CLICKED" in result:
-                        self.stats["clicked"] += 1
-                
-                # Debug screenshots every 5 seconds
-                if self.debug_screenshots:
-                    current_time = time.time()
-                    if current_time - self.last_screenshot_time > self.screenshot_interval:
-                        try:
-                            self.screenshot_count += 1
-                            timestamp = datetime.now().strftime("%H%M%S")
-                            filename = f"debug_{timestamp}_{self.screenshot_count:04d}.png"
-                            filepath = self.screenshot_dir / filename
-                            
-                            # Take screenshot
-                            screenshot = pyautogui.screenshot()
-                            
-                            # Convert to PIL Image for drawing
-                            from PIL import ImageDraw, ImageFont
-                            draw = ImageDraw.Draw(screenshot)
-                            
-                            # Try to find each button and draw box around it
-                            buttons_found = []
-                            confidence = self.config.get("settings", {}).get("confidence", 0.8)
-                            
-                            for btn_name, btn_config in self.config.get("buttons", {}).items():
-                                image_file = btn_config.get("image", "")
-                                image_path = ASSETS_DIR / image_file
-                                
-                                if image_path.exists():
-                                    try:
-                                        location = pyautogui.locate(
-                                            str(image_path),
-                                            screenshot,
-                                            confidence=confidence
-                                        )
-                                        if location:
-                                            # Draw green box around found button
-                                            x, y, w, h = location
-                                            draw.rectangle(
-                                                [x, y, x + w, y + h],
-                                                outline="lime",
-                                                width=3
-                                            )
-                                            # Draw label
-                                            draw.text(
-                                                (x, y - 20),
-                                                f"✓ {btn_name}",
-                                                fill="lime"
-                                            )
-                                            buttons_found.append(btn_name)
-                                    except Exception:
-                                        pass
-                            
-                            # Draw info text at top
-                            info_text = f"Found: {', '.join(buttons_found) if buttons_found else 'None'}"
-                            draw.rectangle([0, 0, 500, 30], fill="black")
-                            draw.text((10, 5), info_text, fill="white")
-                            
-                            screenshot.save(str(filepath))
-                            log(f"📸 Debug screenshot: {filename} | Found: {buttons_found}", self.config)
-                            self.last_screenshot_time = current_time
-                        except Exception as e:
-                            log(f"⚠️ Screenshot error: {e}", self.config)
+                result = self.tick()
                 
-                time.sleep(self.check_interval)
+                # Wake early if stopped; back off while nothing is on screen, and
+                # don't capture at all while an action's cooldown locks us out
+                self._stop_event.wait(max(self.next_interval(result),
+                                          self.button_finder.cooldown_remaining()))
                 
         except KeyboardInterrupt:
             print("\n\n⏹️ Stopped monitoring.")
+        finally:
+            self._stop_event.set()  # stops the debug screenshot thread
+            self.button_finder.close()
         
         self.show_stats()
     
+    def tick(self) -> Optional[Tuple[Result, str]]:
+        """
+        One monitoring step: report allowed-button changes, capture, scan and
+        act, then update stats. Returns the scan result (None = nothing done).
+        """
+        # Check for file input changes (display status)
+        if self.chat_mode_enabled:
+            current_buttons = self.chat_reader.get_allowed_buttons()
+            if current_buttons != self._last_chat_buttons:
+                if current_buttons:
+                    print(f"\n  📄 Active buttons from file: {', '.join(current_buttons)}")
+                else:
+                    print(f"\n  📄 File empty - using config.json defaults")
+                self._last_chat_buttons = current_buttons.copy()
+        
+        # One screenshot per tick, taken only when a scan can matter
+        result = None
+        finder = self.button_finder
+        frame = finder.capture() if finder.ready_to_scan() else None
+        if frame is not None and not self.frame_unchanged(frame[0]):
+            result = finder.scan_and_act(
+                frame,
+                chat_reader=self.chat_reader if self.chat_mode_enabled else None
+            )
+            # Only an idle screen is worth comparing against: not after a hit (the
+            # screen should change), nor when a button was seen but the cooldown
+            # held it back or kept it out of the search (it must be retried)
+            self._last_sig = self._frame_sig if finder.last_scan_idle else None
+        
+        if result:
+            self.stats[result[0]] += 1
+        
+        return result
+    
+    def _debug_loop(self):
+        """Save a debug screenshot every screenshot_interval until stopped."""
+        while not self._stop_event.wait(self.screenshot_interval):
+            self.save_debug_screenshot()
+    
+    def save_debug_screenshot(self):
+        """Capture the full screen, box every button found on it, and save it to tool_ss."""
+        try:
+            self.screenshot_count += 1
+            timestamp = datetime.now().strftime("%H%M%S")
+            filename = f"debug_{timestamp}_{self.screenshot_count:04d}.png"
+            filepath = self.screenshot_dir / filename
+            
+            # Take screenshot (own mss handle: they can't be shared across threads)
+            if HAS_MSS:
+                with mss.mss() as sct:
+                    screenshot = mss_to_image(sct.grab(sct.monitors[1]))
+            else:
+                screenshot = pyautogui.screenshot()
+            
+            # Draw on the PIL screenshot
+            draw = ImageDraw.Draw(screenshot)
+            
+            # Try to find each button and draw box around it
+            buttons_found = []
+            confidence = self.button_finder.confidence
+            
+            for btn_name, _, _, image_file, _ in self.button_finder._buttons:
+                image_path = ASSETS_DIR / image_file
+            
+                if self.button_finder.has_image(image_file):
+                    try:
+                        location = pyautogui.locate(
+                            str(image_path),
+                            screenshot,
+                            confidence=confidence
+                        )
+                        if location:
+                            # Draw green box around found button
+                            x, y, w, h = location
+                            draw.rectangle(
+                                [x, y, x + w, y + h],
+                                outline="lime",
+                                width=3
+                            )
+                            # Draw label
+                            draw.text(
+                                (x, y - 20),
+                                f"✓ {btn_name}",
+                                fill="lime"
+                            )
+                            buttons_found.append(btn_name)
+                    except Exception:
+                        pass
+            
+            # Draw info text at top
+            info_text = f"Found: {', '.join(buttons_found) if buttons_found else 'None'}"
+            draw.rectangle([0, 0, 500, 30], fill="black")
+            draw.text((10, 5), info_text, fill="white")
+            
+            screenshot.save(str(filepath))
+            log(f"📸 Debug screenshot: {filename} | Found: {buttons_found}", self.config)
+        except Exception as e:
+            log(f"⚠️ Screenshot error: {e}", self.config)
+    
+    def frame_unchanged(self, screen_img) -> bool:
+        """
+        True when this frame looks like the last one scanned without a hit, so
+        matching can be skipped. Compares a digest of the coarsest frame level
+        and, when frame_similarity < 1, its grayscale histogram; a full scan is
+        still forced every forced_scan_interval.
+        """
+        if self.frame_similarity > 1.0:
+            return False
+        coarse = screen_img[-1][0] if HAS_CV2 else screen_img[-1]
+        if HAS_CV2 and isinstance(coarse, cv2.UMat):
+            coarse = coarse.get()
+        digest = hashlib.blake2b(coarse.tobytes(), digest_size=8).digest()
+        hist = None
+        if HAS_CV2 and self.frame_similarity < 1.0:
+            hist = cv2.calcHist([coarse], [0], None, [self.FRAME_HIST_BINS], [0, 256])
+            hist = cv2.normalize(hist, None)
+        self._frame_sig = (digest, hist)
+        
+        now = time.monotonic()
+        last = self._last_sig
+        if last is None:
+            changed = True
+        elif digest == last[0]:
+            changed = False  # identical pixels
+        elif hist is not None and last[1] is not None:
+            changed = cv2.compareHist(hist, last[1], cv2.HISTCMP_CORREL) < self.frame_similarity
+        else:
+            changed = True
+        if changed or now - self._last_scan_time >= self.forced_scan_interval:
+            self._last_scan_time = now
+            return False
+        return True
+    
+    def next_interval(self, result: Optional[Tuple[Result, str]]) -> float:
+        """Sleep time before the next scan, backing off exponentially when idle."""
+        if result:
+            self._idle_hits = 0
+            return self.check_interval
+        
+        # Cap the counter so long idle periods can't overflow the float math
+        self._idle_hits = min(self._idle_hits + 1, self.IDLE_SCANS_BEFORE_BACKOFF + 32)
+        extra = self._idle_hits - self.IDLE_SCANS_BEFORE_BACKOFF
+        if extra <= 0:
+            return self.check_interval
+        return min(self.check_interval * self.backoff_factor ** extra, self.max_interval)
+    
     def show_stats(self):
         """Show session statistics."""
         print("\n" + "=" * 40)
         print("  📊 SESSION STATS")
         print("=" * 40)
-        print(f"  ✅ Approved: {self.stats['approved']}")
-        print(f"  ❌ Denied:   {self.stats['denied']}")
-        print(f"  ⏸️ Skipped:  {self.stats['skipped']}")
-        if self.stats['clicked'] > 0:
-            print(f"  🖱️ Clicked:  {self.stats['clicked']}")
+        print(f"  ✅ Approved: {self.stats[Result.APPROVED]}")
+        print(f"  ❌ Denied:   {self.stats[Result.DENIED]}")
+        print(f"  ⏸️ Skipped:  {self.stats[Result.SKIPPED]}")
+        if self.stats[Result.CLICKED] > 0:
+            print(f"  🖱️ Clicked:  {self.stats[Result.CLICKED]}")
         print("=" * 40 + "\n")
 
 # ============================================================================
 # INTERACTIVE CONFIGURATION
 # ============================================================================
 
+# File names in ASSETS_DIR (normcase'd), keyed on the directory's mtime
+_ASSET_NAMES = {"mtime": None, "names": frozenset()}
+
+def asset_exists(image: str) -> bool:
+    """
+    Whether ASSETS_DIR holds a file named image. The directory is listed once
+    with os.scandir() and re-listed only after its mtime changes, so checking
+    many buttons costs one stat() instead of one per image.
+    """
+    if "/" in image or os.sep in image:
+        return (ASSETS_DIR / image).is_file()
+    try:
+        mtime = os.stat(ASSETS_DIR).st_mtime_ns
+    except OSError:
+        return False
+    if mtime != _ASSET_NAMES["mtime"]:
+        with os.scandir(ASSETS_DIR) as entries:
+            _ASSET_NAMES["names"] = frozenset(
+                os.path.normcase(entry.name) for entry in entries if entry.is_file())
+        _ASSET_NAMES["mtime"] = mtime
+    return os.path.normcase(image) in _ASSET_NAMES["names"]
+
+# How each button action is shown in button lists (icon alone / icon and name)
+_ACTION_ICONS = MappingProxyType({"approve": "✅", "deny": "❌", "skip": "⏸️"})
+_ACTION_LABELS = MappingProxyType({"approve": "✅ APPROVE", "deny": "❌ DENY", "skip": "⏸️ SKIP"})
+
+# What the user may type for each button action in the configure / add screens
+_ACTION_MAP = {
+    key: action
+    for action, keys in {
+        "approve": ("a", "1", "approve"),
+        "deny": ("d", "2", "deny"),
+        "skip": ("s", "3", "skip"),
+    }.items()
+    for key in keys
+}
+
 def configure_buttons(config: Dict) -> Dict:
     """Interactive button configuration."""
+    buttons = config.get("buttons", {})
+    if not buttons:
+        print("\n  (no buttons configured - use menu option 5 to add one)")
+        return config
+    
     print("\n" + "=" * 60)
     print("  ⚙️ CONFIGURE BUTTONS")
     print("=" * 60)
@@ -747,26 +2062,27 @@ def configure_buttons(config: Dict) -> Dict:
     print("    Enter = Keep current")
     print("-" * 60)
     
-    buttons = config.get("buttons", {})
+    changed = False
     
     for btn_name, btn_config in buttons.items():
         current = btn_config.get("action", "skip")
-        icons = {"approve": "✅", "deny": "❌", "skip": "⏸️"}
-        icon = icons.get(current, "❓")
+        icon = _ACTION_ICONS.get(current, "❓")
         desc = btn_config.get("description", "")
         
         choice = input(f"  {btn_name:<20} [{icon} {current}] ({desc}): ").strip().lower()
         
-        if choice in ['a', '1', 'approve']:
-            buttons[btn_name]["action"] = "approve"
-        elif choice in ['d', '2', 'deny']:
-            buttons[btn_name]["action"] = "deny"
-        elif choice in ['s', '3', 'skip']:
-            buttons[btn_name]["action"] = "skip"
+        new_action = _ACTION_MAP.get(choice)
+        if new_action is not None and new_action != current:
+            buttons[btn_name]["action"] = new_action
+            changed = True
     
     config["buttons"] = buttons
-    save_config(config)
-    print("\n  ✅ Configuration saved!")
+    # Written at the menu's next commit point, and not at all if nothing changed
+    if changed:
+        mark_config_dirty(config)
+        print("\n  ✅ Configuration updated!")
+    else:
+        print("\n  No changes.")
     return config
 
 def display_settings(config: Dict):
@@ -775,50 +2091,87 @@ def display_settings(config: Dict):
     print("  📋 CURRENT BUTTON SETTINGS")
     print("=" * 60)
     
-    icons = {"approve": "✅ APPROVE", "deny": "❌ DENY", "skip": "⏸️ SKIP"}
-    
-    for btn_name, btn_config in config.get("buttons", {}).items():
-        action = btn_config.get("action", "skip")
+    rows = []
+    buttons = config.get("buttons", {})
+    if not buttons:
+        rows.append("  (no buttons configured - use menu option 5 to add one)")
+    for btn_name, btn_config in buttons.items():
         image = btn_config.get("image", "")
-        icon = icons.get(action, "❓")
-        print(f"  {btn_name:<20} → {icon:<15} ({image})")
+        icon = _ACTION_LABELS.get(btn_config.get("action", "skip"), "❓")
+        missing = "" if image and asset_exists(image) else "  ⚠️ image missing"
+        rows.append(f"  {btn_name.ljust(20)} → {icon.ljust(15)} ({image}){missing}")
+    # One write for the whole table
+    print("\n".join(rows))
     
     print("\n" + "-" * 60)
     print(f"  📂 Config: {CONFIG_FILE}")
     print("=" * 60)
 
+HOTKEY_DEBOUNCE = 0.25  # seconds without a trigger before a hotkey fires again
+
 def hotkey_mode(config: Dict):
     """Manual hotkey mode."""
-    if not HAS_KEYBOARD:
+    if not keyboard_ready():
         print("\n❌ 'keyboard' module required. Run: pip install keyboard")
         return
     
     stats = {"approved": 0, "denied": 0}
-    hotkeys = config.get("hotkeys", DEFAULT_CONFIG["hotkeys"])
+    hotkeys = config.get("hotkeys") or DEFAULT_CONFIG["hotkeys"]
     
-    print("\n" + "=" * 60)
-    print("  🎹 HOTKEY MODE")
-    print("=" * 60)
-    print(f"\n  {hotkeys['approve']:<20} → Approve (Alt+Enter)")
-    print(f"  {hotkeys['deny']:<20} → Deny (Escape)")
-    print(f"  {hotkeys['quit']:<20} → Quit")
-    print("\n" + "=" * 60 + "\n")
+    print("\n".join([
+        "",
+        "=" * 60,
+        "  🎹 HOTKEY MODE",
+        "=" * 60,
+        "",
+        f"  {hotkeys['approve'].ljust(20)} → Approve (Alt+Enter)",
+        f"  {hotkeys['deny'].ljust(20)} → Deny (Escape)",
+        f"  {hotkeys['quit'].ljust(20)} → Quit",
+        "",
+        "=" * 60,
+        "",
+    ]))
     
-    def do_approve():
-        keyboard.press_and_release('alt+enter')
-        stats["approved"] += 1
-        print(f"  ✅ Approved! ({stats['approved']})")
+    # Hook callbacks only send the key and queue an event; counting and printing
+    # happen on this thread so a slow console never delays the keyboard hook
+    events = queue.SimpleQueue()
+    # time.monotonic() of each hotkey's latest trigger, including suppressed ones
+    last_trigger = {"approved": float("-inf"), "denied": float("-inf")}
     
-    def do_deny():
-        keyboard.press_and_release('escape')
-        stats["denied"] += 1
-        print(f"  ❌ Denied! ({stats['denied']})")
+    def fire(shortcut: str, event: str):
+        # A held hotkey auto-repeats; only the first trigger after a pause of
+        # HOTKEY_DEBOUNCE sends a key, so a slow target app isn't flooded
+        now = time.monotonic()
+        quiet = now - last_trigger[event] >= HOTKEY_DEBOUNCE
+        last_trigger[event] = now
+        if quiet:
+            keyboard.press_and_release(shortcut)
+            events.put(event)
     
-    keyboard.add_hotkey(hotkeys['approve'], do_approve)
-    keyboard.add_hotkey(hotkeys['deny'], do_deny)
+    handles = [
+        keyboard.add_hotkey(hotkeys['approve'], fire, args=('alt+enter', "approved")),
+        keyboard.add_hotkey(hotkeys['deny'], fire, args=('escape', "denied")),
+        keyboard.add_hotkey(hotkeys['quit'], events.put, args=("quit",)),
+    ]
+    messages = {"approved": "  ✅ Approved! ({})", "denied": "  ❌ Denied! ({})"}
     
     print("  Waiting... Press", hotkeys['quit'], "to quit.\n")
-    keyboard.wait(hotkeys['quit'])
+    try:
+        while True:
+            try:
+                # Short waits keep Ctrl+C responsive
+                event = events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if event == "quit":
+                break
+            stats[event] += 1
+            print(messages[event].format(stats[event]))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for handle in handles:
+            keyboard.remove_hotkey(handle)
     
     print(f"\n  Stats: {stats['approved']} approved, {stats['denied']} denied\n")
 
@@ -840,31 +2193,87 @@ def add_button(config: Dict) -> Dict:
     print("\n  Action: a=approve, d=deny, s=skip")
     action_input = input("  Select action: ").strip().lower()
     
-    if action_input in ['a', 'approve']:
-        action = "approve"
-    elif action_input in ['d', 'deny']:
-        action = "deny"
-    else:
-        action = "skip"
+    action = _ACTION_MAP.get(action_input, "skip")
     
     desc = input("  Description (optional): ").strip()
     
-    config["buttons"][name] = {
+    new_button = {
         "image": image,
         "action": action,
         "description": desc or f"{name} button"
     }
-    
-    save_config(config)
+    # Re-adding a button exactly as it is configured changes nothing
+    if config["buttons"].get(name) != new_button:
+        config["buttons"][name] = new_button
+        mark_config_dirty(config)
     print(f"\n  ✅ Added button: {name} → {action}")
     
     # Check if image exists
-    if not (ASSETS_DIR / image).exists():
+    if not asset_exists(image):
         print(f"  ⚠️ Image not found: {ASSETS_DIR / image}")
         print("     Use Option 5 to capture the button image.")
     
     return config
 
+def wait_or_keypress(seconds: float) -> bool:
+    """
+    Wait up to seconds, returning early (True) once the user presses a key;
+    outside Windows the console is line-buffered, so that key is Enter.
+    The key press is consumed so it doesn't leak into the next input().
+    """
+    if HAS_MSVCRT:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if msvcrt.kbhit():
+                msvcrt.getwch()
+                return True
+            time.sleep(0.05)
+        return False
+    try:
+        ready, _, _ = select.select([sys.stdin], [], [], seconds)
+    except (OSError, ValueError):
+        # stdin isn't selectable (e.g. redirected on some platforms) - just wait
+        time.sleep(seconds)
+        return False
+    if ready:
+        sys.stdin.readline()
+        return True
+    return False
+
+def read_key(prompt: str) -> str:
+    """
+    Show prompt and return one key press (echoed), without waiting for Enter.
+    Falls back to a line read via input() when stdin isn't an interactive
+    console, so piped input keeps working. Enter alone returns "".
+    """
+    if not sys.stdin.isatty() or not (HAS_MSVCRT or HAS_TERMIOS):
+        return input(prompt).strip()
+    sys.stdout.write(prompt)
+    sys.stdout.flush()
+    if HAS_MSVCRT:
+        key = msvcrt.getwch()
+        if key in ("\x00", "\xe0"):
+            msvcrt.getwch()  # second half of an arrow / function key
+            key = ""
+    else:
+        fd = sys.stdin.fileno()
+        old_attrs = termios.tcgetattr(fd)
+        try:
+            tty.setraw(fd)
+            # Read the fd directly: sys.stdin.read(1) would leave the rest of an
+            # escape sequence or paste in Python's buffer, where select() can't
+            # see it and later prompts would read it as keys
+            data = os.read(fd, 32)
+            key = data.decode("utf-8", errors="replace")[:1]
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+    if key == "\x03":
+        # Raw mode swallows Ctrl+C's signal - raise it like input() would
+        raise KeyboardInterrupt
+    key = "" if key in ("\r", "\n") else key.strip()
+    print(key)
+    return key
+
 def capture_button():
     """Capture a button screenshot."""
     print("\n" + "=" * 60)
@@ -883,11 +2292,11 @@ def capture_button():
         filename += '.png'
     
     print("\n  Move cursor to the button center...")
-    print("  Capturing in 3 seconds...")
-    
-    for i in range(3, 0, -1):
-        print(f"  {i}...")
-        time.sleep(1)
+    if HAS_MSVCRT:
+        print("  Capturing in 3 seconds (press any key to capture now)...")
+    else:
+        print("  Capturing in 3 seconds (press Enter to capture now)...")
+    wait_or_keypress(3)
     
     x, y = pyautogui.position()
     
@@ -896,7 +2305,13 @@ def capture_button():
     height = int(input("  Button height (default 30): ").strip() or "30")
     
     region = (x - width//2, y - height//2, width, height)
-    screenshot = pyautogui.screenshot(region=region)
+    if HAS_MSS:
+        # Grabs just the region instead of the full screen
+        with mss.mss() as sct:
+            left, top, w, h = region
+            screenshot = mss_to_image(sct.grab({"left": left, "top": top, "width": w, "height": h}))
+    else:
+        screenshot = pyautogui.screenshot(region=region)
     
     filepath = ASSETS_DIR / filename
     screenshot.save(str(filepath))
@@ -914,6 +2329,7 @@ def toggle_chat_mode(config: Dict) -> Dict:
     
     chat_config = config.get("chat_input_mode", {})
     enabled = chat_config.get("enabled", True)
+    before = dict(chat_config)  # settings are flat, so a shallow copy is a snapshot
     
     print(f"\n  Current Status: {'🟢 ENABLED' if enabled else '🔴 DISABLED'}")
     print("\n  When ENABLED:")
@@ -932,97 +2348,160 @@ def toggle_chat_mode(config: Dict) -> Dict:
     
     choice = input("\n  Select: ").strip()
     
-    if choice == "1":
-        chat_config["enabled"] = True
-        print("\n  ✅ Chat mode ENABLED")
-    elif choice == "2":
-        chat_config["enabled"] = False
-        print("\n  ✅ Chat mode DISABLED")
+    if choice in ("1", "2"):
+        new_enabled = choice == "1"
+        chat_config["enabled"] = new_enabled
+        print(f"\n  ✅ Chat mode {'ENABLED' if new_enabled else 'DISABLED'}")
     elif choice == "3":
-        print("\n  Configure Chat Mode Settings:")
-        print("  " + "-" * 40)
-        
-        # Window title
-        current_title = chat_config.get("window_title", "Antigravity")
-        new_title = input(f"    Window title [{current_title}]: ").strip()
-        if new_title:
-            chat_config["window_title"] = new_title
-        
-        # Refresh interval
-        current_refresh = chat_config.get("refresh_interval", 2.0)
-        new_refresh = input(f"    Refresh interval seconds [{current_refresh}]: ").strip()
-        if new_refresh:
-            try:
-                chat_config["refresh_interval"] = float(new_refresh)
-            except:
-                pass
-        
-        # Fallback to config
-        current_fallback = chat_config.get("fallback_to_config", True)
-        fallback_str = "y" if current_fallback else "n"
-        new_fallback = input(f"    Use config.json when chat empty? (y/n) [{fallback_str}]: ").strip().lower()
-        if new_fallback in ["y", "yes", "true"]:
-            chat_config["fallback_to_config"] = True
-        elif new_fallback in ["n", "no", "false"]:
-            chat_config["fallback_to_config"] = False
-        
-        print("\n  ✅ Settings updated")
-    
-    config["chat_input_mode"] = chat_config
-    save_config(config)
+        # Show all fields at once and only prompt for the ones picked
+        while True:
+            current_title = chat_config.get("window_title", "Antigravity")
+            current_refresh = chat_config.get("refresh_interval", 2.0)
+            current_fallback = chat_config.get("fallback_to_config", True)
+            print("\n".join([
+                "",
+                "  Configure Chat Mode Settings:",
+                "  " + "-" * 40,
+                f"    1 = Window title [{current_title}]",
+                f"    2 = Refresh interval seconds [{current_refresh}]",
+                f"    3 = Use config.json when chat empty [{'y' if current_fallback else 'n'}]",
+                "    Enter = Done",
+            ]))
+            field = input("\n  Edit: ").strip()
+            
+            if not field:
+                break
+            elif field == "1":
+                new_title = input(f"    Window title [{current_title}]: ").strip()
+                if new_title:
+                    chat_config["window_title"] = new_title
+            elif field == "2":
+                new_refresh = input(f"    Refresh interval seconds [{current_refresh}]: ").strip()
+                try:
+                    refresh = float(new_refresh) if new_refresh else current_refresh
+                except ValueError:
+                    refresh = current_refresh
+                chat_config["refresh_interval"] = refresh
+            elif field == "3":
+                fallback_str = "y" if current_fallback else "n"
+                new_fallback = input(f"    Use config.json when chat empty? (y/n) [{fallback_str}]: ").strip().lower()
+                if new_fallback in ["y", "yes", "true"]:
+                    fallback = True
+                elif new_fallback in ["n", "no", "false"]:
+                    fallback = False
+                else:
+                    fallback = current_fallback
+                chat_config["fallback_to_config"] = fallback
+            else:
+                print("  ❌ Invalid option")
+        
+        print("\n  ✅ Settings updated" if chat_config != before else "\n  No changes.")
+    
+    # Only a real change needs saving; re-selecting the current values is a no-op
+    if chat_config != before:
+        config["chat_input_mode"] = chat_config
+        mark_config_dirty(config)
     return config
 
+# Opens a file in the user's default app, picked once for this platform
+if sys.platform == "win32":
+    _open_file = os.startfile
+elif sys.platform == "darwin":
+    _open_file = lambda path: subprocess.Popen(["open", str(path)])
+else:
+    _open_file = lambda path: subprocess.Popen(["xdg-open", str(path)])
+
+# Menu handlers take the current config and return it when they replace it;
+# returning None keeps the current one
+
+def _menu_monitor(config: Dict):
+    flush_config()  # commit point: config.json matches what the monitor runs with
+    PermissionMonitor(config).start_monitoring()
+
+def _menu_view(config: Dict):
+    display_settings(config)
+    input("\n  Press Enter to continue...")
+
+def _menu_capture(config: Dict):
+    capture_button()
+
+def _menu_open_config(config: Dict):
+    flush_config()  # commit point: show the editor the current settings
+    try:
+        _open_file(CONFIG_FILE)
+    except OSError as e:
+        print(f"\n  📂 Open manually: {CONFIG_FILE} ({e})")
+
+def _menu_invalid(config: Dict):
+    print("  ❌ Invalid option")
+
+# Handlers that can change the config (the menu re-reads it after these)
+_MENU_EDITORS = {configure_buttons, add_button, toggle_chat_mode}
+
+MENU = {
+    "1": _menu_monitor,
+    "2": hotkey_mode,
+    "3": _menu_view,
+    "4": configure_buttons,
+    "5": add_button,
+    "6": _menu_capture,
+    "7": toggle_chat_mode,
+    "8": _menu_open_config,
+}
+
 def main():
     """Main menu."""
-    config = load_config()
+    config = get_config()
     
+    try:
+        _main_menu(config)
+    except KeyboardInterrupt:
+        # Don't lose edits made before Ctrl+C
+        if flush_config():
+            print("\n  💾 Unsaved changes written to config.json")
+        print("\n  👋 Goodbye!\n")
+
+# The whole main menu, written in one call per redraw
+_MENU_TEXT = "\n".join([
+    "",
+    "=" * 60,
+    "  🤖 ANTIGRAVITY AUTO-PERMISSION TOOL",
+    "      (Chat Mode: {chat_status})",
+    "=" * 60,
+    "",
+    "  1 │ 🔍 Start Auto-Monitor",
+    "  2 │ 🎹 Start Hotkey Mode",
+    "  3 │ 📋 View Button Settings",
+    "  4 │ ⚙️  Configure Buttons",
+    "  5 │ ➕ Add New Button",
+    "  6 │ 📸 Capture Button Image",
+    "  7 │ 💬 Toggle Chat Mode",
+    "  8 │ 📂 Open config.json",
+    "  9 │ 🚪 Exit",
+    "",
+    "-" * 60,
+    "",
+])
+
+def _main_menu(config: Dict):
+    """Show the menu and dispatch choices until the user exits."""
+    view = ConfigView(config)
     while True:
-        chat_enabled = config.get("chat_input_mode", {}).get("enabled", True)
-        chat_status = "💬 ON" if chat_enabled else "💬 OFF"
+        chat_status = "💬 ON" if view.chat_enabled else "💬 OFF"
         
-        print("\n" + "=" * 60)
-        print("  🤖 ANTIGRAVITY AUTO-PERMISSION TOOL")
-        print(f"      (Chat Mode: {chat_status})")
-        print("=" * 60)
-        print("\n  1 │ 🔍 Start Auto-Monitor")
-        print("  2 │ 🎹 Start Hotkey Mode")
-        print("  3 │ 📋 View Button Settings")
-        print("  4 │ ⚙️  Configure Buttons")
-        print("  5 │ ➕ Add New Button")
-        print("  6 │ 📸 Capture Button Image")
-        print("  7 │ 💬 Toggle Chat Mode")
-        print("  8 │ 📂 Open config.json")
-        print("  9 │ 🚪 Exit")
-        print("\n" + "-" * 60)
-        
-        choice = input("  Select (1-9): ").strip()
-        
-        if choice == "1":
-            monitor = PermissionMonitor(config)
-            monitor.start_monitoring()
-        elif choice == "2":
-            hotkey_mode(config)
-        elif choice == "3":
-            display_settings(config)
-            input("\n  Press Enter to continue...")
-        elif choice == "4":
-            config = configure_buttons(config)
-        elif choice == "5":
-            config = add_button(config)
-        elif choice == "6":
-            capture_button()
-        elif choice == "7":
-            config = toggle_chat_mode(config)
-        elif choice == "8":
-            try:
-                os.startfile(CONFIG_FILE)
-            except:
-                print(f"\n  📂 Open: {CONFIG_FILE}")
-        elif choice == "9":
+        sys.stdout.write(_MENU_TEXT.format(chat_status=chat_status))
+        
+        choice = read_key("  Select (1-9): ")
+        
+        if choice == "9":
+            if flush_config():
+                print("\n  💾 Changes written to config.json")
             print("\n  👋 Goodbye!\n")
             break
-        else:
-            print("  ❌ Invalid option")
+        handler = MENU.get(choice, _menu_invalid)
+        config = handler(config) or config
+        if handler in _MENU_EDITORS:
+            view = ConfigView(config)  # the handler may have changed the config
 
 if __name__ == "__main__":
     main()